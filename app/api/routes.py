@@ -8,9 +8,18 @@ Define os endpoints principais:
 
 import logging
 
-from fastapi import APIRouter, HTTPException, status
+import orjson
 
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.responses import OrjsonResponse
+from app.core.singleflight import SingleFlight, make_key
 from app.models.schemas import (
     ChatRequest,
     ChatResponse,
@@ -21,6 +30,8 @@ from app.models.schemas import (
     ProactiveChatRequest,
     RAGSearchRequest,
     RAGSearchResponse,
+    CHAT_REQUEST_ADAPTER,
+    CHAT_RESPONSE_ADAPTER,
 )
 from app.services.llm_provider import (
     get_llm_provider,
@@ -28,14 +39,67 @@ from app.services.llm_provider import (
     ProviderNotAvailableError,
     ModelNotFoundError,
 )
-from app.services.memory import get_memory_manager
+from app.services.memory import MemoryManager, get_memory_manager
+from app.services.batcher import get_chat_batcher
 from app.services.persona_service import PersonaService
-from app.rag.retriever import search_with_metadata
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Configurações lidas no caminho de requisição (não mudam em runtime)
+_LLM_PROVIDER = settings.llm_provider
+_ACTIVE_MODEL = settings.active_model_name
+_READ_YOUR_WRITES = settings.memory_read_your_writes
+
+# Cache de respostas para entradas idênticas (retries da UI, avaliações)
+_CHAT_CACHE = TTLCache(maxsize=settings.response_cache_size, ttl=settings.response_cache_ttl)
+_RAG_CACHE = TTLCache(maxsize=settings.response_cache_size, ttl=settings.response_cache_ttl)
+_CACHE_BYPASS_SUFFIX = settings.response_cache_bypass_suffix
+
+# Buscas idênticas simultâneas compartilham a mesma execução
+_RAG_FLIGHT = SingleFlight()
+
+# Personas e perfis são estáticos: serializa as respostas uma única vez
+# (só os campos públicos; prompts e contextos ficam no servidor)
+_PERSONAS_JSON = orjson.dumps([
+    PersonaResponse(id=p.id, name=p.name, description=p.description).model_dump()
+    for p in PersonaService.get_personas()
+])
+_TARGET_PROFILES_JSON = orjson.dumps([
+    TargetProfileResponse(id=p.id, name=p.name, description=p.description).model_dump()
+    for p in PersonaService.get_target_profiles()
+])
+
+
+def _chat_cache_key(request: ChatRequest, history: list[dict]) -> tuple | None:
+    """
+    Chave do cache do /chat, ou None se a requisição não deve usar cache.
+    
+    Inclui o histórico carregado: a mesma mensagem ("sim", "ok") em outro
+    ponto da conversa não pode reaproveitar uma resposta de outro contexto.
+    """
+    if not _CHAT_CACHE.enabled:
+        return None
+    if _CACHE_BYPASS_SUFFIX and request.message.endswith(_CACHE_BYPASS_SUFFIX):
+        return None
+    return (request.session_id, make_key(request.message, history), request.model_override)
+
+
+async def parse_chat_request(request: Request) -> ChatRequest:
+    """
+    Valida o corpo do /chat direto dos bytes com o adapter pré-compilado.
+    
+    Evita o json.loads + validação de dict genérica do FastAPI; erros
+    continuam retornando 422 no mesmo formato.
+    """
+    try:
+        return CHAT_REQUEST_ADAPTER.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+
 
 @router.post(
     "/chat",
@@ -50,18 +114,27 @@ router = APIRouter()
         "Envia uma mensagem para o chatbot e recebe uma resposta. "
         "O histórico da conversa é mantido por session_id."
     ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": ChatRequest.model_json_schema()}},
+        },
+    },
 )
-async def chat(request: ChatRequest) -> ChatResponse:
+async def chat(
+    background_tasks: BackgroundTasks,
+    request: ChatRequest = Depends(parse_chat_request),
+) -> Response:
     """
     Processa uma mensagem do usuário e retorna a resposta do chatbot.
     
     O endpoint:
     1. Recupera o histórico da sessão
     2. Envia a mensagem + histórico para o provider LLM
-    3. Salva tanto a mensagem quanto a resposta no histórico
-    4. Retorna a resposta
+    3. Retorna a resposta
+    4. Salva a mensagem e a resposta no histórico (em background, após o envio)
     """
-    logger.info(f"Chat request - session: {request.session_id}, message length: {len(request.message)}")
+    logger.info("Chat request - session: %s, message length: %d", request.session_id, len(request.message))
     
     try:
         # Obtém instâncias dos serviços
@@ -69,28 +142,53 @@ async def chat(request: ChatRequest) -> ChatResponse:
         memory = get_memory_manager()
         
         # Recupera histórico formatado para o LLM
-        history = memory.get_formatted_history(request.session_id)
+        history = await _load_history(memory, request.session_id)
         
-        # Gera resposta
-        reply = await provider.generate(request.message, history, model_override=request.model_override)
+        # Mesma mensagem no mesmo ponto da conversa: devolve a resposta já
+        # gerada (e a registra no histórico, como uma resposta nova)
+        cache_key = _chat_cache_key(request, history)
+        if cache_key is not None:
+            cached = _CHAT_CACHE.get(cache_key)
+            if cached is not None:
+                logger.debug("Chat cache hit - session: %s", request.session_id)
+                content, reply = cached
+                await _persist_exchange(
+                    background_tasks, memory, request.session_id, request.message, reply
+                )
+                return Response(content=content, media_type="application/json")
+        
+        # Gera resposta (agrupada com requisições concorrentes no mesmo lote;
+        # gerações idênticas simultâneas são deduplicadas pelo provider)
+        reply = await get_chat_batcher().submit(
+            provider,
+            request.message,
+            history,
+            model_override=request.model_override,
+        )
         
-        # Salva mensagem do usuário e resposta no histórico
-        memory.add_message(request.session_id, "user", request.message)
-        memory.add_message(request.session_id, "assistant", reply)
+        # Salva mensagem do usuário e resposta (após o envio, salvo com vários workers)
+        await _persist_exchange(
+            background_tasks, memory, request.session_id, request.message, reply
+        )
         
-        logger.info(f"Chat response - session: {request.session_id}, reply length: {len(reply)}")
+        logger.info("Chat response - session: %s, reply length: %d", request.session_id, len(reply))
         
-        used_model = request.model_override if request.model_override else provider.model
+        used_model = request.model_override or provider.model
         
-        return ChatResponse(
+        response = ChatResponse(
             session_id=request.session_id,
             reply=reply,
             provider=provider.name,
             model=used_model,
         )
+        content = CHAT_RESPONSE_ADAPTER.dump_json(response)
+        if cache_key is not None:
+            _CHAT_CACHE.set(cache_key, (content, reply))
+        
+        return Response(content=content, media_type="application/json")
     
     except ProviderNotAvailableError as e:
-        logger.error(f"Provider not available: {e}")
+        logger.error("Provider not available: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail={
@@ -100,7 +198,7 @@ async def chat(request: ChatRequest) -> ChatResponse:
         )
     
     except ModelNotFoundError as e:
-        logger.error(f"Model not found: {e}")
+        logger.error("Model not found: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail={
@@ -110,7 +208,7 @@ async def chat(request: ChatRequest) -> ChatResponse:
         )
     
     except LLMProviderError as e:
-        logger.error(f"LLM provider error: {e}")
+        logger.error("LLM provider error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={
@@ -120,7 +218,7 @@ async def chat(request: ChatRequest) -> ChatResponse:
         )
     
     except Exception as e:
-        logger.exception(f"Unexpected error in chat: {e}")
+        logger.exception("Unexpected error in chat: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={
@@ -130,19 +228,167 @@ async def chat(request: ChatRequest) -> ChatResponse:
         )
 
 
+async def _load_history(memory: MemoryManager, session_id: str) -> list[dict]:
+    """
+    Histórico formatado da sessão, sem bloquear o event loop.
+    
+    Managers com I/O em disco (SQLite) são lidos no threadpool; o em memória
+    responde direto, sem o custo da troca de thread.
+    """
+    if memory.blocking_io:
+        return await run_in_threadpool(memory.get_formatted_history, session_id)
+    return memory.get_formatted_history(session_id)
+
+
+def _save_exchange(memory: MemoryManager, session_id: str, message: str, reply: str) -> None:
+    """
+    Persiste a mensagem do usuário e a resposta, nesta ordem.
+    
+    Síncrono de propósito: roda no threadpool (BackgroundTasks/run_in_threadpool)
+    para que o I/O do SQLite não bloqueie o event loop. Com
+    MEMORY_READ_YOUR_WRITES, só retorna depois que a gravação foi commitada.
+    """
+    memory.add_message(session_id, "user", message)
+    memory.add_message(session_id, "assistant", reply)
+    if _READ_YOUR_WRITES:
+        memory.flush(session_id)
+
+
+async def _persist_exchange(
+    background_tasks: BackgroundTasks,
+    memory: MemoryManager,
+    session_id: str,
+    message: str,
+    reply: str,
+) -> None:
+    """
+    Agenda a gravação para depois do envio da resposta ou, com vários workers
+    (MEMORY_READ_YOUR_WRITES), grava antes: a próxima mensagem da sessão pode
+    ser atendida por outro processo, que só enxerga o que já foi commitado.
+    """
+    if _READ_YOUR_WRITES:
+        await run_in_threadpool(_save_exchange, memory, session_id, message, reply)
+    else:
+        background_tasks.add_task(_save_exchange, memory, session_id, message, reply)
+
+
+def _sse(data: object, event: str | None = None) -> bytes:
+    """Formata um evento Server-Sent Events com payload JSON."""
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+def _stream_error_payload(error: Exception) -> dict:
+    """Converte erros do provider no payload do evento `error` do stream."""
+    if isinstance(error, ProviderNotAvailableError):
+        return {"error": "provider_unavailable", "message": str(error)}
+    if isinstance(error, ModelNotFoundError):
+        return {"error": "model_not_found", "message": str(error)}
+    if isinstance(error, LLMProviderError):
+        return {"error": "llm_error", "message": str(error)}
+    return {
+        "error": "internal_error",
+        "message": "Erro interno ao processar mensagem. Verifique os logs.",
+    }
+
+
+@router.post(
+    "/chat/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Stream SSE com os pedaços da resposta e um evento final `done`",
+            "content": {"text/event-stream": {}},
+        },
+        503: {"model": ErrorResponse, "description": "Provider LLM não disponível"},
+    },
+    summary="Enviar mensagem ao chatbot (streaming)",
+    description=(
+        "Igual ao /chat, mas devolve a resposta via Server-Sent Events à medida "
+        "que o modelo gera os tokens. Cada evento `data` traz um pedaço do texto "
+        "(string JSON); o evento `done` traz o ChatResponse completo e o evento "
+        "`error` indica falha no meio da geração."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": ChatRequest.model_json_schema()}},
+        },
+    },
+)
+async def chat_stream(request: ChatRequest = Depends(parse_chat_request)) -> StreamingResponse:
+    """
+    Processa uma mensagem e transmite a resposta token a token.
+    
+    O histórico só é atualizado quando a geração termina com sucesso.
+    """
+    logger.info("Chat stream request - session: %s, message length: %d", request.session_id, len(request.message))
+    
+    try:
+        provider = get_llm_provider()
+        memory = get_memory_manager()
+        history = await _load_history(memory, request.session_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"error": "provider_unavailable", "message": str(e)},
+        )
+    except Exception as e:
+        logger.exception("Unexpected error before chat stream: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error": "internal_error",
+                "message": "Erro interno ao processar mensagem. Verifique os logs.",
+            },
+        )
+    
+    used_model = request.model_override or provider.model
+    
+    async def event_source():
+        parts = []
+        try:
+            async for chunk in provider.generate_stream(
+                request.message,
+                history,
+                model_override=request.model_override,
+            ):
+                parts.append(chunk)
+                yield _sse(chunk)
+            
+            reply = "".join(parts).strip()
+            await run_in_threadpool(_save_exchange, memory, request.session_id, request.message, reply)
+        except Exception as e:
+            logger.exception("Error in chat stream: %s", e)
+            yield _sse(_stream_error_payload(e), event="error")
+            return
+        
+        logger.info("Chat stream response - session: %s, reply length: %d", request.session_id, len(reply))
+        
+        done = ChatResponse(
+            session_id=request.session_id,
+            reply=reply,
+            provider=provider.name,
+            model=used_model,
+        )
+        yield _sse(done.model_dump(), event="done")
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/personas",
     response_model=list[PersonaResponse],
     summary="Listar personas disponíveis",
     description="Retorna a lista de personas para chat proativo.",
 )
-async def list_personas() -> list[PersonaResponse]:
-    """Retorna lista de personas."""
-    personas = PersonaService.get_personas()
-    return [
-        PersonaResponse(id=p.id, name=p.name, description=p.description)
-        for p in personas
-    ]
+async def list_personas() -> Response:
+    """Retorna lista de personas (JSON pré-serializado)."""
+    return Response(content=_PERSONAS_JSON, media_type="application/json")
 
 
 @router.get(
@@ -151,13 +397,9 @@ async def list_personas() -> list[PersonaResponse]:
     summary="Listar perfis de usuários alvo",
     description="Retorna a lista de perfis de usuários para contexto da notificação.",
 )
-async def list_target_profiles() -> list[TargetProfileResponse]:
-    """Retorna lista de perfis alvo."""
-    profiles = PersonaService.get_target_profiles()
-    return [
-        TargetProfileResponse(id=p.id, name=p.name, description=p.description)
-        for p in profiles
-    ]
+async def list_target_profiles() -> Response:
+    """Retorna lista de perfis alvo (JSON pré-serializado)."""
+    return Response(content=_TARGET_PROFILES_JSON, media_type="application/json")
 
 
 @router.post(
@@ -185,7 +427,7 @@ async def chat_proactive(request: ProactiveChatRequest) -> ChatResponse:
         provider = get_llm_provider()
         
         # Identifica o modelo usado
-        used_model = request.model_override if request.model_override else provider.model
+        used_model = request.model_override or provider.model
         
         return ChatResponse(
             session_id="new-session", # Placeholder
@@ -200,13 +442,72 @@ async def chat_proactive(request: ProactiveChatRequest) -> ChatResponse:
             detail={"error": "persona_not_found", "message": str(e)},
         )
     except Exception as e:
-        logger.exception(f"Error in proactive chat: {e}")
+        logger.exception("Error in proactive chat: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"error": "internal_error", "message": str(e)},
         )
 
 
+@router.post(
+    "/chat/proactive/stream",
+    summary="Gerar mensagem proativa (streaming)",
+    description=(
+        "Mesmo que /chat/proactive, mas transmite a mensagem via Server-Sent Events: "
+        "eventos `message` com cada trecho gerado e um evento final `done` com a "
+        "resposta completa (ou `error` em caso de falha)."
+    ),
+    response_class=StreamingResponse,
+)
+async def chat_proactive_stream(request: ProactiveChatRequest) -> StreamingResponse:
+    """Gera uma mensagem proativa transmitindo os tokens conforme são gerados."""
+    if PersonaService.get_persona_by_id(request.persona_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": "persona_not_found", "message": f"Persona '{request.persona_id}' não encontrada."},
+        )
+    
+    try:
+        provider = get_llm_provider()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"error": "provider_unavailable", "message": str(e)},
+        )
+    
+    async def event_source():
+        parts = []
+        try:
+            async for chunk in PersonaService.generate_proactive_message_stream(
+                request.persona_id,
+                target_profile_id=request.target_profile_id,
+                persona_override=request.persona_override,
+                model_override=request.model_override,
+                use_rag=request.use_rag,
+                provider=provider,
+            ):
+                parts.append(chunk)
+                yield _sse(chunk)
+        except Exception as e:
+            logger.exception("Error in proactive chat stream: %s", e)
+            yield _sse(_stream_error_payload(e), event="error")
+            return
+        
+        done = ChatResponse(
+            session_id="new-session", # Placeholder
+            reply="".join(parts).strip(),
+            provider=provider.name,
+            model=request.model_override or provider.model,
+        )
+        yield _sse(done.model_dump(), event="done")
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/health",
     response_model=HealthResponse,
@@ -251,59 +552,68 @@ async def health() -> HealthResponse:
         # Provider não pode ser criado (ex: HF sem token)
         return HealthResponse(
             status="unhealthy",
-            provider=settings.llm_provider,
-            model=settings.ollama_model if settings.llm_provider == "ollama" else settings.hf_model,
+            provider=_LLM_PROVIDER,
+            model=_ACTIVE_MODEL,
             provider_available=False,
             message=str(e),
         )
     
     except Exception as e:
-        logger.exception(f"Error in health check: {e}")
+        logger.exception("Error in health check: %s", e)
         return HealthResponse(
             status="unhealthy",
-            provider=settings.llm_provider,
+            provider=_LLM_PROVIDER,
             model="unknown",
             provider_available=False,
             message=f"Erro ao verificar status: {e}",
         )
 
+
+def _search_rag(query: str, k: int) -> list[dict]:
+    """
+    Executa a busca vetorial.
+    
+    O retriever (langchain + chromadb) é importado só no primeiro uso, para
+    não pesar no startup nem na memória de quem só atende /chat e /health.
+    Chamado via threadpool, então o import inicial também não trava o loop.
+    """
+    from app.rag.retriever import search_with_metadata, to_dicts
+    
+    return to_dicts(search_with_metadata(query, k=k))
+
+
 @router.post(
     "/rag/search",
     response_model=RAGSearchResponse,
+    response_class=OrjsonResponse,
     summary="Buscar no RAG",
     description="Pesquisa diretamente na base de conhecimento vetorial (PDFs).",
 )
 async def semantic_search(request: RAGSearchRequest) -> RAGSearchResponse:
     """Pesquisa vetorial crua para o Frontend Visualizador."""
+    cache_key = (request.query, request.k)
+    cached = _RAG_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        results = search_with_metadata(request.query, k=request.k)
-        return RAGSearchResponse(
+        # Busca síncrona (Chroma + embedding via HTTP): roda no threadpool
+        results = await _RAG_FLIGHT.do(
+            cache_key,
+            lambda: run_in_threadpool(_search_rag, request.query, request.k),
+        )
+        response = RAGSearchResponse(
             results=results,
             query_echo=request.query
         )
+        _RAG_CACHE.set(cache_key, response)
+        return response
     except Exception as e:
-        logger.exception(f"Erro na busca RAG: {e}")
+        logger.exception("Erro na busca RAG: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"error": "rag_search_error", "message": str(e)},
         )
-        return HealthResponse(
-            status="unhealthy",
-            provider=settings.llm_provider,
-            model=settings.ollama_model if settings.llm_provider == "ollama" else settings.hf_model,
-            provider_available=False,
-            message=str(e),
-        )
-    
-    except Exception as e:
-        logger.exception(f"Error in health check: {e}")
-        return HealthResponse(
-            status="unhealthy",
-            provider=settings.llm_provider,
-            model="unknown",
-            provider_available=False,
-            message=f"Erro ao verificar status: {e}",
-        )
 
 
 from app.api.db import (
@@ -313,13 +623,17 @@ from app.api.db import (
 from app.models.schemas import SavedNotificationCreate, SavedNotificationResponse
 
 
+# Os endpoints abaixo fazem I/O síncrono no SQLite: declarados com `def`
+# para o FastAPI executá-los no threadpool sem travar o event loop.
+
+
 @router.get(
     "/notifications/saved",
     response_model=list[SavedNotificationResponse],
     summary="Listar notificações salvas",
     description="Retorna todas as notificações avaliadas pelo usuário.",
 )
-async def list_saved_notifications():
+def list_saved_notifications():
     notifications = get_all_saved_notifications()
     return notifications
 
@@ -330,7 +644,7 @@ async def list_saved_notifications():
     summary="Salvar notificação",
     description="Salva uma notificação no banco de dados SQLite.",
 )
-async def create_saved_notification(request: SavedNotificationCreate):
+def create_saved_notification(request: SavedNotificationCreate):
     success = save_notification(request.model_dump())
     if not success:
         from fastapi import HTTPException, status
@@ -346,7 +660,7 @@ async def create_saved_notification(request: SavedNotificationCreate):
     response_model=dict,
     summary="Limpar todas as notificações salvas",
 )
-async def clear_saved_notifications():
+def clear_saved_notifications():
     deleted_count = clear_all_notifications()
     return {"status": "success", "deleted": deleted_count}
 
@@ -356,7 +670,7 @@ async def clear_saved_notifications():
     response_model=dict,
     summary="Deletar uma notificação salva específica",
 )
-async def delete_saved_notification(notif_id: str):
+def delete_saved_notification(notif_id: str):
     success = delete_notification(notif_id)
     if not success:
         from fastapi import HTTPException, status
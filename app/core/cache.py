@@ -0,0 +1,84 @@
+"""
+Cache em memória com expiração (TTL) e descarte LRU.
+
+Usado para evitar repetir chamadas caras (LLM, busca vetorial)
+quando a mesma entrada chega várias vezes em um curto intervalo.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class TTLCache:
+    """
+    Cache LRU limitado por tamanho e por tempo de vida.
+
+    - Thread-safe (pode ser usado a partir do threadpool do FastAPI)
+    - Entradas expiradas são descartadas na leitura
+    - Mantém contadores de acerto/erro para monitoramento
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Cache com tamanho ou TTL zero não armazena nada."""
+        return self._maxsize > 0 and self._ttl > 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Proporção de leituras atendidas pelo cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor armazenado ou `default` se ausente/expirado."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Armazena um valor, descartando o menos usado se estiver cheio."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove uma entrada e retorna seu valor."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
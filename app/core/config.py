@@ -5,7 +5,9 @@ Todas as configurações podem ser definidas via variáveis de ambiente
 ou arquivo .env na raiz do projeto.
 """
 
+from functools import cached_property
 from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -45,6 +47,19 @@ class Settings(BaseSettings):
     - phi3:mini     (3.8B params, ~2GB)
     """
     
+    ollama_num_parallel: int = 4
+    """
+    Requisições simultâneas que o servidor Ollama processa por modelo.
+    Deve acompanhar a variável OLLAMA_NUM_PARALLEL usada no `ollama serve`;
+    limita o fan-out dos lotes enviados pelo /chat.
+    """
+    
+    ollama_max_loaded_models: int = 1
+    """Modelos mantidos carregados pelo Ollama (OLLAMA_MAX_LOADED_MODELS no `ollama serve`)."""
+    
+    ollama_keep_alive: str = "30m"
+    """Tempo que o Ollama mantém o modelo na memória após cada requisição (ex: '30m', '-1' = sempre)."""
+    
     # ==========================================
     # Configurações HuggingFace
     # ==========================================
@@ -54,6 +69,12 @@ class Settings(BaseSettings):
     hf_model: str = "microsoft/DialoGPT-small"
     """Modelo HuggingFace para inferência via API."""
     
+    hf_history_char_budget: int = 4000
+    """Máximo de caracteres do histórico incluídos no prompt do HuggingFace (mensagens mais recentes primeiro)."""
+    
+    hf_temperature: float = 0.7
+    """Temperatura de amostragem do HuggingFace (0 = determinístico)."""
+    
     # ==========================================
     # Configurações Google Gemini
     # ==========================================
@@ -78,12 +99,116 @@ class Settings(BaseSettings):
     memory_max_messages: int = 10
     """Número máximo de mensagens mantidas no histórico por sessão."""
     
+    memory_max_sessions: int = 10_000
+    """Sessões mantidas em RAM (sem SQLite); as usadas há mais tempo são descartadas."""
+    
     use_sqlite: bool = False
     """Se True, persiste conversas em SQLite. Se False, mantém apenas em memória."""
     
     sqlite_path: str = "./data/conversations.db"
     """Caminho do arquivo SQLite (usado apenas se use_sqlite=True)."""
     
+    memory_read_your_writes: bool = False
+    """
+    Se True, o histórico é gravado (e commitado) antes de a resposta ser enviada.
+    Necessário com vários workers: a próxima mensagem da sessão pode cair em outro
+    processo. `python -m app.main` liga automaticamente ao subir mais de um worker.
+    """
+    
+    # ==========================================
+    # Cliente HTTP dos providers
+    # ==========================================
+    http_max_connections: int = 2000
+    """Conexões simultâneas máximas no pool HTTP compartilhado pelos providers."""
+    
+    http_max_keepalive_connections: int = 100
+    """Conexões ociosas mantidas abertas (keep-alive) para reuso."""
+    
+    http_keepalive_expiry: float = 60.0
+    """Tempo (s) que uma conexão ociosa do pool fica aberta antes de ser descartada."""
+    
+    http2_enabled: bool = True
+    """Usa HTTP/2 em hosts HTTPS (multiplexa as chamadas em uma conexão). Requer o pacote h2."""
+    
+    # ==========================================
+    # Cache de respostas
+    # ==========================================
+    response_cache_size: int = 1024
+    """Entradas mantidas no cache de respostas do /chat e /rag/search. 0 desativa."""
+    
+    response_cache_ttl: int = 300
+    """Tempo de vida (segundos) de uma resposta em cache. 0 desativa."""
+    
+    response_cache_bypass_suffix: str | None = None
+    """Mensagens que terminam com este sufixo (ex: '!nocache') ignoram o cache."""
+    
+    llm_cache_enabled: bool = True
+    """Cacheia gerações idênticas (modelo + prompt + histórico) no provider, se a temperatura permitir."""
+    
+    llm_cache_max_temperature: float = 0.3
+    """Só cacheia gerações de providers com temperatura até este valor (respostas quase determinísticas)."""
+    
+    llm_cache_size: int = 1024
+    """Entradas mantidas no cache de gerações do provider. 0 desativa."""
+    
+    llm_cache_ttl: int = 300
+    """Tempo de vida (segundos) de uma geração em cache. 0 desativa."""
+    
+    # ==========================================
+    # Micro-batching do /chat
+    # ==========================================
+    chat_batch_window_ms: int = 20
+    """Janela (ms) para agrupar requisições concorrentes do /chat em um lote. 0 desativa."""
+    
+    chat_batch_max_size: int = 8
+    """Número máximo de requisições enviadas ao provider em um mesmo lote."""
+    
+    # ==========================================
+    # Mensagens proativas
+    # ==========================================
+    proactive_max_concurrency: int = 16
+    """
+    Gerações simultâneas ao disparar mensagens proativas em lote.
+    Com Ollama, o servidor só processa OLLAMA_NUM_PARALLEL de cada vez;
+    o excedente espera na fila do próprio Ollama.
+    """
+    
+    proactive_cache_size: int = 1024
+    """Mensagens proativas mantidas em cache (mesma persona, perfil, override e modelo). 0 desativa."""
+    
+    proactive_cache_ttl: int = 300
+    """Tempo de vida (segundos) de uma mensagem proativa em cache. 0 desativa."""
+    
+    proactive_warmup: bool = False
+    """Se True, gera uma mensagem por persona em background no startup (aquece o cache de prefixo do provider)."""
+    
+    # ==========================================
+    # RAG
+    # ==========================================
+    rag_query_cache_size: int = 2000
+    """Número máximo de embeddings de consultas mantidos em cache."""
+    
+    rag_query_cache_ttl: int = 3600
+    """Tempo de vida (s) do embedding de uma consulta no cache. 0 desativa."""
+    
+    rag_query_cache_disk: bool = True
+    """Se True, também persiste os embeddings de consultas em disco (sobrevive a reinícios)."""
+    
+    rag_query_cache_disk_max_entries: int = 100_000
+    """Número máximo de embeddings de consultas mantidos no cache em disco."""
+    
+    rag_query_cache_quantize: bool = True
+    """Se True, guarda os embeddings em memória quantizados em int8 (4x menos memória)."""
+    
+    rag_hnsw_search_ef: int = 40
+    """Candidatos explorados por busca no índice HNSW (maior = mais recall, mais lento)."""
+    
+    # ==========================================
+    # Health check
+    # ==========================================
+    health_cache_ttl: float = 5.0
+    """Tempo (s) que o resultado do probe de disponibilidade do provider é reaproveitado. 0 desativa."""
+    
     # ==========================================
     # Configurações do Servidor
     # ==========================================
@@ -98,6 +223,26 @@ class Settings(BaseSettings):
     
     debug: bool = False
     """Modo debug - ativa logs mais detalhados."""
+    
+    log_format: Literal["text", "json"] = "text"
+    """Formato dos logs: 'text' (legível) ou 'json' (uma linha JSON por registro)."""
+    
+    static_cache_max_age: int = 3600
+    """Tempo (s) que o navegador pode manter a interface estática em cache."""
+    
+    @cached_property
+    def default_models(self) -> dict[str, str]:
+        """Modelo padrão de cada provider, indexado pelo nome do provider."""
+        return {
+            "ollama": self.ollama_model,
+            "huggingface": self.hf_model,
+            "google": self.gemini_model,
+        }
+    
+    @cached_property
+    def active_model_name(self) -> str:
+        """Modelo padrão do provider configurado (calculado uma única vez)."""
+        return self.default_models[self.llm_provider]
 
 
 # Instância global de configurações (singleton)
@@ -0,0 +1,100 @@
+"""
+Configuração de logging com trace id por requisição.
+
+- `trace_id_var` guarda o id da requisição corrente (ContextVar, então
+  acompanha a task e as chamadas feitas a partir dela)
+- `TraceIdMiddleware` define o id no início de cada requisição HTTP
+- Todo registro de log ganha o campo `trace_id`, em texto ou em JSON
+"""
+
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+
+import orjson
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+TRACE_ID_HEADER = "x-request-id"
+
+trace_id_var: ContextVar[str | None] = ContextVar("trace_id", default=None)
+
+_TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s"
+_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class TraceIdFilter(logging.Filter):
+    """Anexa o trace id corrente a cada registro de log."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON (serializada com orjson)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": time.strftime(_DATE_FORMAT, time.localtime(record.created)),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(payload).decode()
+
+
+def configure_logging() -> None:
+    """Configura o logger raiz conforme DEBUG e LOG_FORMAT."""
+    handler = logging.StreamHandler()
+    handler.addFilter(TraceIdFilter())
+    if settings.log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(_TEXT_FORMAT, datefmt=_DATE_FORMAT))
+
+    logging.basicConfig(
+        level=logging.DEBUG if settings.debug else logging.INFO,
+        handlers=[handler],
+    )
+
+
+class TraceIdMiddleware:
+    """
+    Middleware ASGI que define o trace id de cada requisição.
+
+    Reaproveita o header X-Request-ID enviado pelo cliente (ou proxy) quando
+    existir e devolve o id usado no mesmo header da resposta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = None
+        for name, value in scope["headers"]:
+            if name == TRACE_ID_HEADER.encode():
+                trace_id = value.decode("latin-1")[:64]
+                break
+        trace_id = trace_id or uuid.uuid4().hex
+
+        async def send_with_trace_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[TRACE_ID_HEADER] = trace_id
+            await send(message)
+
+        token = trace_id_var.set(trace_id)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            trace_id_var.reset(token)
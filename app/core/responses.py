@@ -0,0 +1,20 @@
+"""
+Classes de resposta HTTP customizadas.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    Resposta JSON serializada com orjson.
+    
+    Equivalente ao `ORJSONResponse` do FastAPI (descontinuado nas versões
+    recentes), mantido aqui para não depender da versão instalada.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
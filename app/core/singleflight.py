@@ -0,0 +1,68 @@
+"""
+Deduplicação de chamadas concorrentes idênticas (single-flight).
+
+Enquanto uma chamada com determinada chave está em andamento, novas
+chamadas com a mesma chave aguardam o mesmo resultado em vez de repetir
+o trabalho (ex: mesma busca RAG ou mesmo prompt chegando ao mesmo tempo).
+"""
+
+import asyncio
+import hashlib
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+import orjson
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+T = TypeVar("T")
+
+
+def make_key(*parts: Any) -> int | bytes:
+    """
+    Chave compacta (hash de 128 bits) para partes serializáveis em JSON.
+    
+    Usa xxh3 (bem mais rápido que hashes criptográficos em entradas curtas)
+    quando o xxhash está instalado, com o inteiro como chave; senão, blake2b.
+    """
+    data = orjson.dumps(parts)
+    if xxhash is not None:
+        return xxhash.xxh3_128_intdigest(data)
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class SingleFlight:
+    """
+    Compartilha o resultado de chamadas concorrentes com a mesma chave.
+
+    - Só deduplica chamadas em andamento; nada é cacheado depois que termina
+    - Erros são propagados para todos que aguardavam a chamada
+    - Um chamador cancelado não cancela a chamada dos demais
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Executa `fn()` ou aguarda a execução em andamento com a mesma chave."""
+        future = self._inflight.get(key)
+        # Futures pertencem a um event loop; não compartilha entre loops diferentes
+        if future is None or future.get_loop() is not asyncio.get_running_loop():
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Marca a exceção como lida caso todos os chamadores tenham sido cancelados
+        if not future.cancelled():
+            future.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
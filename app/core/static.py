@@ -0,0 +1,26 @@
+"""
+Arquivos estáticos da interface de testes.
+
+Subclasse do StaticFiles do Starlette que adiciona Cache-Control às
+respostas, para o navegador reaproveitar a interface entre visitas.
+"""
+
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.core.config import settings
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles com cabeçalho `Cache-Control: public, max-age=...`."""
+
+    def __init__(self, *args, max_age: int = settings.static_cache_max_age, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_control = f"public, max-age={max_age}"
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers.setdefault("Cache-Control", self._cache_control)
+        return response
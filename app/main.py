@@ -5,6 +5,7 @@ Ponto de entrada da aplicação FastAPI.
 Configura rotas, middleware, e lifecycle da aplicação.
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -12,29 +13,36 @@ from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
 from app.core.config import settings
+from app.core.logs import TraceIdMiddleware, configure_logging
+from app.core.responses import OrjsonResponse
+from app.core.static import CachedStaticFiles
 
 # Diretório de arquivos estáticos
 STATIC_DIR = Path(__file__).parent / "static"
 from app.api.routes import router
-from app.services.llm_provider import close_provider
-from app.services.memory import close_memory_manager
+from app.services.http import close_shared_async_client
+from app.services.llm_provider import get_llm_provider, close_provider
+from app.services.memory import get_memory_manager, close_memory_manager
+from app.services.persona_service import warmup_proactive_messages
 
 # ==========================================
 # Configuração de Logging
 # ==========================================
-logging.basicConfig(
-    level=logging.DEBUG if settings.debug else logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+configure_logging()
 
 logger = logging.getLogger(__name__)
 
 
+async def _warmup(provider) -> None:
+    """Aquece o provider e, se configurado, o prefixo de cada persona."""
+    await provider.warmup()
+    if settings.proactive_warmup:
+        await warmup_proactive_messages()
+
+
 # ==========================================
 # Lifecycle da Aplicação
 # ==========================================
@@ -50,13 +58,11 @@ async def lifespan(app: FastAPI):
     logger.info("=" * 50)
     logger.info(f"🚀 Iniciando {settings.app_name}")
     logger.info(f"   Provider: {settings.llm_provider}")
+    logger.info(f"   Modelo: {settings.active_model_name}")
     if settings.llm_provider == "ollama":
-        logger.info(f"   Modelo: {settings.ollama_model}")
         logger.info(f"   Ollama URL: {settings.ollama_base_url}")
-    elif settings.llm_provider == "google":
-        logger.info(f"   Modelo: {settings.gemini_model}")
-    else:
-        logger.info(f"   Modelo: {settings.hf_model}")
+        logger.info(f"   Ollama paralelismo: {settings.ollama_num_parallel}")
+        logger.info(f"   Ollama modelos carregados: {settings.ollama_max_loaded_models}")
     logger.info(f"   Memória: {'SQLite' if settings.use_sqlite else 'RAM'}")
     logger.info(f"   Max mensagens: {settings.memory_max_messages}")
     logger.info("=" * 50)
@@ -65,11 +71,25 @@ async def lifespan(app: FastAPI):
     from app.api.db import init_db
     init_db()
     
+    # Cria os singletons dos serviços já no startup, para que a primeira
+    # requisição não pague a criação do provider/banco de memória
+    get_memory_manager()
+    
+    # Pré-aquece o provider (conexões HTTP/TLS, personas) sem atrasar o startup
+    warmup_task = None
+    try:
+        warmup_task = asyncio.create_task(_warmup(get_llm_provider()))
+    except ValueError as e:
+        logger.warning(f"Provider não inicializado no startup: {e}")
+    
     yield
     
     # ----- SHUTDOWN -----
     logger.info("🛑 Encerrando aplicação...")
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
     await close_provider()
+    await close_shared_async_client()
     close_memory_manager()
     logger.info("✅ Recursos liberados")
 
@@ -82,6 +102,7 @@ app = FastAPI(
     description=settings.app_description,
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=OrjsonResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
@@ -107,8 +128,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Trace id por requisição, propagado para todos os logs
+app.add_middleware(TraceIdMiddleware)
+
 
 # ==========================================
 # Rotas
@@ -116,34 +141,59 @@ app.add_middleware(
 app.include_router(router, tags=["chat"])
 
 # ==========================================
-# Rota raiz (serve a interface de testes)
+# Páginas da interface de testes
 # ==========================================
-@app.get("/", include_in_schema=False)
-async def root():
-    """Serve a página inicial."""
-    return FileResponse(STATIC_DIR / "index.html")
-
+# URLs sem extensão não são resolvidas pelo StaticFiles, então mantêm
+# handlers próprios; o restante (incluindo "/") vem do mount abaixo.
 @app.get("/notifications", include_in_schema=False)
 async def notifications_page():
     """Serve a interface de testes de notificações."""
-    return FileResponse(STATIC_DIR / "notifications.html")
+    return FileResponse(
+        STATIC_DIR / "notifications.html",
+        headers={"Cache-Control": f"public, max-age={settings.static_cache_max_age}"},
+    )
 
 @app.get("/rag", include_in_schema=False)
 async def rag_dashboard_page():
     """Serve o visualizador do RAG."""
-    return FileResponse(STATIC_DIR / "rag.html")
+    return FileResponse(
+        STATIC_DIR / "rag.html",
+        headers={"Cache-Control": f"public, max-age={settings.static_cache_max_age}"},
+    )
+
+
+# Montado por último: "/" captura qualquer caminho não atendido pelas rotas acima
+app.mount("/", CachedStaticFiles(directory=STATIC_DIR, html=True), name="static")
 
 
 # ==========================================
 # Execução direta (opcional)
 # ==========================================
 if __name__ == "__main__":
+    import os
+    import sys
+    
     import uvicorn
     
+    # Sessões em RAM (e os caches de resposta) vivem dentro de cada processo,
+    # então múltiplos workers só são seguros com a memória em SQLite
+    workers = 1 if settings.debug or not settings.use_sqlite else (os.cpu_count() or 1)
+    
+    # A escrita do SQLite é assíncrona (thread por processo): com vários workers
+    # o histórico precisa estar commitado antes da resposta, pois a próxima
+    # mensagem da sessão pode ir para outro worker. Os workers herdam o ambiente.
+    if workers > 1:
+        os.environ.setdefault("MEMORY_READ_YOUR_WRITES", "true")
+    
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=settings.debug,
+        workers=workers,
+        # uvloop não existe no Windows; lá o uvicorn usa o loop padrão
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools",
+        access_log=settings.debug,
         log_level="debug" if settings.debug else "info",
     )
@@ -5,7 +5,7 @@ Define os modelos de dados usados na API.
 """
 
 from typing import Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 class ChatRequest(BaseModel):
@@ -137,6 +137,12 @@ class ChatResponse(BaseModel):
     )
 
 
+# Adapters pré-compilados para o caminho quente do /chat:
+# validam direto dos bytes JSON e serializam para bytes sem passar por dicts
+CHAT_REQUEST_ADAPTER = TypeAdapter(ChatRequest)
+CHAT_RESPONSE_ADAPTER = TypeAdapter(ChatResponse)
+
+
 class HealthResponse(BaseModel):
     """Response do endpoint /health."""
     
@@ -1,64 +1,181 @@
 import os
 import argparse
+import asyncio
 import time
+from concurrent.futures import ProcessPoolExecutor
 from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from .vector_db import get_vector_store
 
-def ingest_pdfs(pdf_paths: list[str]):
+# Limite do gemini-embedding-001 no tier grátis: 100 embeddings por minuto.
+# Cada chunk enviado conta como uma requisição na cota.
+DEFAULT_EMBEDDINGS_PER_MINUTE = 100
+DEFAULT_BATCH_SIZE = 100
+
+
+class TokenBucket:
     """
-    Processa uma lista de caminhos de PDFs, os divide em chunks menores, e os ingere no ChromaDB.
+    Rate limiter assíncrono (token bucket).
+
+    Os tokens são repostos continuamente a `rate` por `period` segundos,
+    então os batches saem assim que há cota disponível, em vez de dormir
+    um intervalo fixo entre eles.
     """
-    print(f"Iniciando ingestão de {len(pdf_paths)} documentos...")
-    vector_store = get_vector_store()
-    
-    # Text splitter otimizado para não perder muito contexto (overlap)
-    text_splitter = RecursiveCharacterTextSplitter(
+
+    def __init__(self, rate: float, period: float = 60.0):
+        self._capacity = rate
+        self._tokens = rate
+        self._fill_rate = rate / period
+        self._updated_at = time.monotonic()
+        self._lock: asyncio.Lock | None = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._fill_rate)
+        self._updated_at = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """
+        Aguarda até haver `amount` tokens e os consome (ordem de chegada).
+
+        Pedidos maiores que a capacidade são consumidos em partes do tamanho
+        da capacidade: um batch maior que a cota espera o tempo proporcional,
+        em vez de passar cobrando só `capacity` tokens.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            remaining = amount
+            while remaining > 0:
+                part = min(remaining, self._capacity)
+                self._refill()
+                while self._tokens < part:
+                    await asyncio.sleep((part - self._tokens) / self._fill_rate)
+                    self._refill()
+                self._tokens -= part
+                remaining -= part
+
+
+def _build_text_splitter() -> RecursiveCharacterTextSplitter:
+    """Text splitter otimizado para não perder muito contexto (overlap)."""
+    return RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=200,
         length_function=len
     )
-    
+
+
+def _load_and_split(path: str) -> list[Document]:
+    """
+    Carrega um PDF e o divide em chunks.
+
+    Roda em um processo separado (parsing de PDF é CPU-bound), por isso
+    recebe só o caminho e monta o próprio splitter.
+    """
+    loader = PyPDFLoader(path)
+    documents = loader.load()
+    return _build_text_splitter().split_documents(documents)
+
+
+async def _embed_chunks(
+    vector_store,
+    chunks: list[Document],
+    batch_size: int,
+    embeddings_per_minute: int,
+) -> int:
+    """
+    Envia os chunks ao vector store em batches concorrentes, respeitando a cota.
+
+    Returns:
+        Número de chunks inseridos com sucesso
+    """
+    limiter = TokenBucket(embeddings_per_minute, period=60.0)
+    batches = [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+    total_batches = len(batches)
+
+    async def embed_batch(batch_num: int, batch: list[Document]) -> int:
+        await limiter.acquire(len(batch))
+        print(f"    -> Enviando batch {batch_num}/{total_batches} ({len(batch)} chunks)...")
+        await vector_store.aadd_documents(batch)
+        return len(batch)
+
+    results = await asyncio.gather(
+        *(embed_batch(n, batch) for n, batch in enumerate(batches, start=1)),
+        return_exceptions=True,
+    )
+
+    inserted = 0
+    for batch_num, result in enumerate(results, start=1):
+        if isinstance(result, BaseException):
+            print(f"Erro ao inserir batch {batch_num}/{total_batches}: {result}")
+        else:
+            inserted += result
+    return inserted
+
+
+def ingest_pdfs(
+    pdf_paths: list[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    embeddings_per_minute: int = DEFAULT_EMBEDDINGS_PER_MINUTE,
+):
+    """
+    Processa uma lista de caminhos de PDFs, os divide em chunks menores, e os ingere no ChromaDB.
+    """
+    print(f"Iniciando ingestão de {len(pdf_paths)} documentos...")
+    vector_store = get_vector_store()
+
+    existing_paths = []
     for path in pdf_paths:
         if not os.path.exists(path):
             print(f"Erro: Arquivo não encontrado: {path}")
             continue
-            
-        print(f"Processando: {path}")
-        try:
-            loader = PyPDFLoader(path)
-            documents = loader.load()
-            
-            # Cortar em chunks
-            chunks = text_splitter.split_documents(documents)
-            total_chunks = len(chunks)
-            print(f"  -> Dividido em {total_chunks} chunks. Inserindo no ChromaDB em batches...")
-            
-            # Batching para evitar RESOURCE_EXHAUSTED (Limite tier grátis Google: ~2k RPM ou 15 RPM dependendo do modelo)
-            # Para gemini-embedding-001 o limite é 100 requisições por minuto.
-            batch_size = 50
-            for i in range(0, total_chunks, batch_size):
-                batch = chunks[i:i + batch_size]
-                current_batch_num = (i // batch_size) + 1
-                total_batches = (total_chunks + batch_size - 1) // batch_size
-                
-                print(f"    -> Enviando batch {current_batch_num}/{total_batches} ({len(batch)} chunks)...")
-                vector_store.add_documents(batch)
-                
-                # Se não for o último batch, esperar para não estourar a cota de 100 requisições por minuto
-                if i + batch_size < total_chunks:
-                    print("    -> Aguardando 65 segundos para respeitar a cota da API (Tier Grátis)...")
-                    time.sleep(65)
-            
-            print(f"  -> Concluído: {path}")
-        except Exception as e:
-            print(f"Erro ao processar {path}: {e}")
-            
-    print("Ingestão finalizada com sucesso!")
+        existing_paths.append(path)
+
+    # Parsing + split dos PDFs em paralelo, um processo por núcleo
+    chunks: list[Document] = []
+    if existing_paths:
+        max_workers = min(len(existing_paths), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {path: executor.submit(_load_and_split, path) for path in existing_paths}
+            for path, future in futures.items():
+                print(f"Processando: {path}")
+                try:
+                    pdf_chunks = future.result()
+                    print(f"  -> Dividido em {len(pdf_chunks)} chunks.")
+                    chunks.extend(pdf_chunks)
+                except Exception as e:
+                    print(f"Erro ao processar {path}: {e}")
+
+    if not chunks:
+        print("Nenhum chunk para inserir.")
+        return
+
+    # Batching + token bucket para evitar RESOURCE_EXHAUSTED sem ociosidade entre batches
+    print(
+        f"Inserindo {len(chunks)} chunks no ChromaDB em batches de {batch_size} "
+        f"(limite: {embeddings_per_minute} embeddings/min)..."
+    )
+    inserted = asyncio.run(_embed_chunks(vector_store, chunks, batch_size, embeddings_per_minute))
+
+    print(f"Ingestão finalizada: {inserted}/{len(chunks)} chunks inseridos.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Ingestão de dados (PDFs) no banco vetorial RAG.")
     parser.add_argument("pdfs", nargs="+", help="Caminhos dos arquivos PDF para ingestão")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Chunks por chamada de embedding (padrão: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=DEFAULT_EMBEDDINGS_PER_MINUTE,
+        help=f"Cota de embeddings por minuto da API (padrão: {DEFAULT_EMBEDDINGS_PER_MINUTE})",
+    )
     args = parser.parse_args()
-    
-    ingest_pdfs(args.pdfs)
+
+    ingest_pdfs(args.pdfs, batch_size=args.batch_size, embeddings_per_minute=args.rpm)
@@ -0,0 +1,207 @@
+"""
+Cache de embeddings de consultas do RAG.
+
+Cada busca precisava embedar a query com uma chamada HTTPS à API de
+embeddings. Consultas repetidas (a query fixa das mensagens proativas,
+buscas repetidas no visualizador) passam a reaproveitar o vetor.
+
+Dois níveis: LRU + TTL em memória e, opcionalmente, um SQLite em disco
+para os vetores sobreviverem a reinícios do processo.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Callable
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class QueryEmbedder(Protocol):
+    """Qualquer objeto com `embed_query` (ex: embeddings do LangChain)."""
+
+    def embed_query(self, text: str) -> list[float]: ...
+
+
+def quantize(embedding: list[float]) -> tuple[float, np.ndarray]:
+    """Quantização linear simétrica para int8, com uma escala por vetor."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    peak = float(np.abs(vector).max()) if vector.size else 0.0
+    scale = peak / 127.0 if peak > 0 else 1.0
+    return scale, np.round(vector / scale).astype(np.int8)
+
+
+def dequantize(scale: float, values: np.ndarray) -> list[float]:
+    """Reconstrói o vetor float a partir da versão int8."""
+    return (values.astype(np.float32) * scale).tolist()
+
+
+class DiskEmbeddingStore:
+    """
+    Nível em disco do cache de embeddings (SQLite, vetores em float32).
+
+    - Sem TTL: o vetor de uma query só muda com o modelo, que faz parte da chave
+    - Mantém no máximo `max_entries`, descartando as entradas mais antigas
+    - O arquivo só é criado/aberto no primeiro `get`/`set` (importar o
+      retriever não toca o disco)
+    """
+
+    # A limpeza por tamanho roda a cada N inserções, não em todas
+    _PRUNE_EVERY = 1000
+
+    def __init__(self, path: str | Path, max_entries: int = settings.rag_query_cache_disk_max_entries):
+        self._path = Path(path)
+        self._max_entries = max_entries
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Abre o banco na primeira chamada (chamar com `_lock` adquirido)."""
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                " key BLOB PRIMARY KEY,"
+                " embedding BLOB NOT NULL,"
+                " created_at REAL NOT NULL"
+                ")"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: bytes) -> list[float] | None:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT embedding FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return array("f", row[0]).tolist()
+
+    def set(self, key: bytes, embedding: list[float]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings (key, embedding, created_at) VALUES (?, ?, ?)",
+                (key, array("f", embedding).tobytes(), time.time()),
+            )
+            self._inserts += 1
+            if self._inserts % self._PRUNE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM query_embeddings WHERE key NOT IN ("
+                    " SELECT key FROM query_embeddings ORDER BY created_at DESC LIMIT ?"
+                    ")",
+                    (self._max_entries,),
+                )
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class QueryEmbeddingCache:
+    """
+    Cache LRU + TTL de `query -> vetor de embedding`.
+
+    - Chave é o SHA-256 de `namespace::query` (o namespace é o modelo de
+      embedding, então trocar de modelo invalida o cache)
+    - Thread-safe (o retriever roda no threadpool)
+    - Com `disk`, faltas em memória consultam o disco e vetores novos são
+      gravados nos dois níveis
+    - Com `quantized`, o nível em memória guarda os vetores em int8 (4x
+      menos memória); o erro de quantização fica bem abaixo da variação
+      de recall da busca HNSW
+    - Expõe `hit_rate` (nível em memória) para monitoramento
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.rag_query_cache_size,
+        ttl: float = settings.rag_query_cache_ttl,
+        namespace: str = "",
+        disk: DiskEmbeddingStore | None = None,
+        quantized: bool = settings.rag_query_cache_quantize,
+    ):
+        self._cache = TTLCache(maxsize=max_size, ttl=ttl)
+        self._namespace = namespace
+        self._disk = disk
+        self._quantized = quantized
+
+    def _key(self, query: str) -> bytes:
+        return hashlib.sha256(f"{self._namespace}::{query}".encode()).digest()
+
+    @property
+    def hit_rate(self) -> float:
+        return self._cache.hit_rate
+
+    def _remember(self, key: bytes, embedding: list[float]) -> None:
+        """Guarda o vetor no nível em memória (quantizado, se habilitado)."""
+        self._cache.set(key, quantize(embedding) if self._quantized else embedding)
+
+    def get(self, query: str) -> list[float] | None:
+        """Retorna o vetor cacheado da query, se houver (memória, depois disco)."""
+        key = self._key(query)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return dequantize(*cached) if self._quantized else cached
+
+        if self._disk is not None:
+            embedding = self._disk.get(key)
+            if embedding is not None:
+                self._remember(key, embedding)
+            return embedding
+        return None
+
+    def set(self, query: str, embedding: list[float]) -> None:
+        """Armazena o vetor da query em todos os níveis."""
+        key = self._key(query)
+        self._remember(key, embedding)
+        if self._disk is not None:
+            self._disk.set(key, embedding)
+
+    def get_or_embed(self, query: str, embedder: QueryEmbedder) -> list[float]:
+        """Retorna o vetor da query, calculando com `embedder` só se não estiver no cache."""
+        embedding = self.get(query)
+        if embedding is None:
+            embedding = embedder.embed_query(query)
+            self.set(query, embedding)
+        return embedding
+
+    def get_many_or_embed(
+        self,
+        queries: list[str],
+        embed_many: Callable[[list[str]], list[list[float]]],
+    ) -> list[list[float]]:
+        """
+        Retorna os vetores de várias queries, na mesma ordem.
+
+        As queries fora do cache (sem repetição) são embedadas juntas em uma
+        única chamada de `embed_many`.
+        """
+        found = {query: self.get(query) for query in dict.fromkeys(queries)}
+        missing = [query for query, embedding in found.items() if embedding is None]
+
+        if missing:
+            for query, embedding in zip(missing, embed_many(missing)):
+                self.set(query, embedding)
+                found[query] = embedding
+
+        return [found[query] for query in queries]
+
+    def clear(self) -> None:
+        """Limpa o nível em memória."""
+        self._cache.clear()
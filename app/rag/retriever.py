@@ -1,6 +1,59 @@
+import io
 import os
+from functools import lru_cache
 from typing import List, Dict, Any
-from .vector_db import get_vector_store
+
+import numpy as np
+
+from app.core.config import settings
+from .query_cache import DiskEmbeddingStore, QueryEmbeddingCache
+from .vector_db import EMBEDDING_MODEL, QUERY_CACHE_PATH, get_vector_store
+
+# Layout dos resultados de busca: um array estruturado por consulta, para
+# rerankers e filtros operarem sobre `records["score"]` de forma vetorizada
+# (score em float64: a API devolve a distância exata, sem arredondar para float32)
+RESULT_DTYPE = np.dtype([("content", "O"), ("source", "O"), ("page", "i4"), ("score", "f8")])
+
+# A partir de quantos trechos o contexto é montado em um buffer único
+_STREAMED_CONTEXT_MIN_DOCS = 8
+
+# Cache de embeddings das consultas, com nível em disco se habilitado
+query_embedding_cache = QueryEmbeddingCache(
+    namespace=EMBEDDING_MODEL,
+    disk=DiskEmbeddingStore(QUERY_CACHE_PATH) if settings.rag_query_cache_disk else None,
+)
+
+
+def _embed_query(vector_store, query: str) -> list[float]:
+    """Embedding da query, reaproveitado do cache quando possível."""
+    return query_embedding_cache.get_or_embed(query, vector_store.embeddings)
+
+def _search_distinct(vector_store, vector: list[float], k: int):
+    """
+    Top-k por vetor sem chunks repetidos da mesma página.
+    
+    Busca com folga (k * 3, mínimo 16) e mantém só o melhor chunk de cada
+    (source, page): o HNSW costuma devolver trechos quase iguais da mesma página.
+    Chunks sem source/page só são descartados se repetirem id ou conteúdo.
+    """
+    k_fetch = max(k * 3, 16)
+    results = vector_store.similarity_search_by_vector_with_relevance_scores(vector, k=k_fetch)
+    
+    seen = set()
+    distinct = []
+    for doc, score in results:
+        source, page = doc.metadata.get("source"), doc.metadata.get("page")
+        if source is not None and page is not None:
+            key = ("page", source, page)
+        else:
+            key = ("chunk", getattr(doc, "id", None) or doc.page_content)
+        if key in seen:
+            continue
+        seen.add(key)
+        distinct.append((doc, score))
+        if len(distinct) == k:
+            break
+    return distinct
 
 def get_relevant_context(query: str, k: int = 4):
     """
@@ -10,43 +63,94 @@ def get_relevant_context(query: str, k: int = 4):
     vector_store = get_vector_store()
     
     # Faz a busca por similaridade
-    docs = vector_store.similarity_search(query, k=k)
+    docs = [doc for doc, _ in _search_distinct(vector_store, _embed_query(vector_store, query), k)]
     
     if not docs:
         return ""
         
     # Combina os textos recuperados com uma separação clara
-    context_chunks = [f"--- Trecho {i+1} ---\n{doc.page_content}" for i, doc in enumerate(docs)]
-    return "\n\n".join(context_chunks)
+    if len(docs) > _STREAMED_CONTEXT_MIN_DOCS:
+        return _join_context_streamed(docs)
+    return "\n\n".join(f"--- Trecho {i} ---\n{doc.page_content}" for i, doc in enumerate(docs, start=1))
 
-def search_with_metadata(query: str, k: int = 4) -> List[Dict[str, Any]]:
+def _join_context_streamed(docs) -> str:
+    """
+    Mesmo formato do join de `get_relevant_context`, escrito direto em um
+    StringIO: evita uma string intermediária por trecho em contextos grandes.
     """
-    Busca no banco vetorial e retorna a lista detalhada de resultados
+    buffer = io.StringIO()
+    write = buffer.write
+    for i, doc in enumerate(docs, start=1):
+        if i > 1:
+            write("\n\n")
+        write("--- Trecho ")
+        write(str(i))
+        write(" ---\n")
+        write(doc.page_content)
+    return buffer.getvalue()
+
+def search_with_metadata(query: str, k: int = 4) -> np.ndarray:
+    """
+    Busca no banco vetorial e retorna os resultados detalhados
     com os metadados (como nome do arquivo PDF original da página).
-    Usado pelo frontend de visualização RAG.
+    Usado pelo frontend de visualização RAG (via `to_dicts`).
+    
+    Returns:
+        Array estruturado com dtype `RESULT_DTYPE`, na ordem do ranking
     """
     vector_store = get_vector_store()
     
-    # search_with_score retorna os documentos e a similaridade
-    results = vector_store.similarity_search_with_score(query, k=k)
+    # Retorna os documentos e a distância (menor = mais similar)
+    results = _search_distinct(vector_store, _embed_query(vector_store, query), k)
     
-    formatted_results = []
-    for doc, score in results:
-        metadata = doc.metadata
-        source = metadata.get("source", "Desconhecido")
-        page = metadata.get("page", 0)
-        
-        # Limpa o caminho longo do arquivo se houver (para visualização)
-        filename = os.path.basename(source)
-            
-        formatted_results.append({
-            "content": doc.page_content,
-            "source": filename,
-            "page": page,
-            "score": float(score)  # distâncias menores geralmente significam maior similaridade
-        })
-        
-    return formatted_results
+    return _format_results(results)
+
+def search_with_metadata_batch(queries: List[str], k: int = 4) -> List[np.ndarray]:
+    """
+    Versão em lote de `search_with_metadata` (ex: multi-query, HyDE).
+    As queries fora do cache são embedadas em uma única chamada à API,
+    e cada uma é buscada no índice já carregado.
+    """
+    vector_store = get_vector_store()
+    embeddings = vector_store.embeddings
+    
+    # embed_documents usa RETRIEVAL_DOCUMENT por padrão; força o tipo de consulta
+    # para os vetores serem os mesmos do embed_query (e do cache)
+    vectors = query_embedding_cache.get_many_or_embed(
+        queries,
+        lambda texts: embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY"),
+    )
+    
+    return [
+        _format_results(_search_distinct(vector_store, vector, k))
+        for vector in vectors
+    ]
+
+@lru_cache(maxsize=4096)
+def _basename(path: str) -> str:
+    """Nome do arquivo de um caminho (os mesmos PDFs se repetem entre buscas)."""
+    return os.path.basename(path)
+
+def _format_results(results) -> np.ndarray:
+    """Converte pares (documento, distância) no array estruturado de resultados."""
+    return np.array(
+        [
+            (
+                doc.page_content,
+                # Limpa o caminho longo do arquivo se houver (para visualização)
+                _basename(doc.metadata.get("source", "Desconhecido")),
+                int(doc.metadata.get("page") or 0),  # loaders podem gravar page=None
+                score,  # distâncias menores geralmente significam maior similaridade
+            )
+            for doc, score in results
+        ],
+        dtype=RESULT_DTYPE,
+    )
+
+def to_dicts(records: np.ndarray) -> List[Dict[str, Any]]:
+    """Converte os resultados no formato da API (lista de dicts com tipos nativos)."""
+    names = records.dtype.names
+    return [dict(zip(names, row)) for row in records.tolist()]
 
 if __name__ == "__main__":
     # Teste simples
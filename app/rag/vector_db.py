@@ -1,37 +1,81 @@
+import logging
 import os
+from functools import lru_cache
 from pathlib import Path
 from langchain_chroma import Chroma
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
 
+from app.core.config import settings
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Diretório onde o banco vetorial será salvo fisicamente
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DB_DIR = str(BASE_DIR / "data" / "chroma_db")
 os.makedirs(DB_DIR, exist_ok=True)
 
+# Cache em disco dos embeddings de consultas (ver query_cache.py)
+QUERY_CACHE_PATH = BASE_DIR / "data" / "query_embeddings.db"
+
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+
+# Parâmetros do índice HNSW, aplicados apenas quando a coleção é criada.
+# Grafo construído com mais vizinhos candidatos (construction_ef) melhora o
+# recall sem custo nas buscas; search_ef controla o custo de cada busca.
+HNSW_COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 400,
+    "hnsw:search_ef": settings.rag_hnsw_search_ef,
+}
+
+@lru_cache(maxsize=1)
 def get_base_embeddings():
     """
     Retorna o modelo de embeddings do Google Generative AI.
     Usaremos o modelo padrão text-embedding-004 se a chave estiver disponível.
+    A instância é criada uma única vez e reaproveitada (cliente HTTPS já aquecido).
     """
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         api_key = os.getenv("GOOGLE_API_KEY") # fallback common in langchain
         
     return GoogleGenerativeAIEmbeddings(
-        model="models/gemini-embedding-001",
+        model=EMBEDDING_MODEL,
         google_api_key=api_key
     )
 
+@lru_cache(maxsize=8)
 def get_vector_store(collection_name: str = "notifications_knowledge"):
     """
     Inicializa e retorna o Vector Store do Chroma persistente.
+    Cacheado por coleção: abrir o Chroma (SQLite + índice HNSW) é caro e
+    não deve se repetir a cada busca.
     """
     embeddings = get_base_embeddings()
-    return Chroma(
+    store = Chroma(
         collection_name=collection_name,
         embedding_function=embeddings,
-        persist_directory=DB_DIR
+        persist_directory=DB_DIR,
+        collection_metadata=HNSW_COLLECTION_METADATA,
     )
+    _apply_search_ef(store, settings.rag_hnsw_search_ef)
+    return store
+
+def _apply_search_ef(store: Chroma, ef_search: int) -> None:
+    """
+    Ajusta o ef_search da coleção (inclusive coleções criadas antes dos
+    parâmetros acima). O Chroma não aceita ef por consulta: o valor vale
+    para a coleção inteira e fica persistido.
+    """
+    collection = store._collection
+    try:
+        current = collection.configuration_json["hnsw"]["ef_search"]
+        if current != ef_search:
+            collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+            logger.info(f"ef_search da coleção '{collection.name}' ajustado: {current} -> {ef_search}")
+    except Exception as e:
+        logger.warning(f"Não foi possível ajustar o ef_search da coleção: {e}")
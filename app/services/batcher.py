@@ -0,0 +1,142 @@
+"""
+Micro-batching de requisições ao provider LLM.
+
+Requisições ao /chat que chegam dentro de uma janela curta (ex: 20ms) são
+agrupadas por (provider, modelo) e enviadas juntas via `generate_batch`,
+permitindo que o provider processe o lote de forma concorrente.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.services.llm_provider import LLMProvider
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingBatch:
+    """Lote em formação, aguardando a janela fechar ou atingir o tamanho máximo."""
+    provider: LLMProvider
+    model_override: str | None
+    prompts: list[str] = field(default_factory=list)
+    histories: list[list[dict] | None] = field(default_factory=list)
+    futures: list[asyncio.Future] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+class ChatBatcher:
+    """
+    Agrupa chamadas concorrentes de `generate` em lotes.
+
+    - A primeira requisição de uma chave (provider, modelo) abre a janela
+    - Requisições seguintes com a mesma chave entram no mesmo lote
+    - O lote é despachado quando a janela expira ou quando enche
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = settings.chat_batch_max_size,
+        max_wait_ms: int = settings.chat_batch_window_ms,
+    ):
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0, max_wait_ms) / 1000
+        self._pending: dict[tuple[int, str | None], _PendingBatch] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        provider: LLMProvider,
+        prompt: str,
+        history: list[dict] | None = None,
+        model_override: str | None = None,
+    ) -> str:
+        """
+        Enfileira um prompt no lote corrente e aguarda a resposta.
+
+        Com batching desativado (janela 0 ou lote de 1), chama o provider direto.
+        """
+        if self._max_wait == 0 or self._max_batch_size == 1:
+            return await provider.generate(prompt, history, model_override=model_override)
+
+        loop = asyncio.get_running_loop()
+        key = (id(provider), model_override)
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch(provider=provider, model_override=model_override)
+            batch.timer = loop.call_later(self._max_wait, self._dispatch, key)
+            self._pending[key] = batch
+
+        future = loop.create_future()
+        batch.prompts.append(prompt)
+        batch.histories.append(history)
+        batch.futures.append(future)
+
+        if len(batch.futures) >= self._max_batch_size:
+            self._dispatch(key)
+
+        return await future
+
+    def _dispatch(self, key: tuple[int, str | None]) -> None:
+        """Fecha o lote da chave e agenda seu processamento."""
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+
+        if batch.timer is not None:
+            batch.timer.cancel()
+
+        # Mantém referência às tasks para não serem coletadas antes de terminar
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _PendingBatch) -> None:
+        """Executa o lote no provider e distribui os resultados."""
+        try:
+            if len(batch.prompts) == 1:
+                results = [
+                    await batch.provider.generate(
+                        batch.prompts[0],
+                        batch.histories[0],
+                        model_override=batch.model_override,
+                    )
+                ]
+            else:
+                logger.debug(f"Despachando lote de {len(batch.prompts)} requisições")
+                results = await batch.provider.generate_batch(
+                    batch.prompts,
+                    batch.histories,
+                    model_override=batch.model_override,
+                )
+        except Exception as e:
+            results = [e] * len(batch.futures)
+
+        for future, result in zip(batch.futures, results):
+            # Requisição pode ter sido cancelada (cliente desconectou)
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# ==========================================
+# Factory para o batcher
+# ==========================================
+
+_batcher_instance: ChatBatcher | None = None
+
+
+def get_chat_batcher() -> ChatBatcher:
+    """Retorna o batcher global do /chat."""
+    global _batcher_instance
+
+    if _batcher_instance is None:
+        _batcher_instance = ChatBatcher()
+
+    return _batcher_instance
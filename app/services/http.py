@@ -0,0 +1,79 @@
+"""
+Cliente HTTP compartilhado pela aplicação.
+
+Todos os providers baseados em HTTP (Ollama, HuggingFace) usam o mesmo
+pool de conexões; credenciais vão nos headers de cada requisição, nunca
+no cliente. O cliente é fechado no shutdown da aplicação.
+"""
+
+import asyncio
+import threading
+
+import httpx
+
+from app.core.config import settings
+
+# Respostas comprimidas (o httpx descomprime sozinho). Brotli só é anunciado
+# se houver decodificador instalado (extra httpx[brotli])
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "br, gzip"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip"
+
+# HTTP/2 depende do pacote h2 (extra httpx[http2])
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Um cliente por event loop: o pool de conexões do httpx fica preso ao loop
+# em que foi criado e não pode ser usado a partir de outro
+_clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_shared_async_client() -> httpx.AsyncClient:
+    """
+    Retorna o cliente HTTP compartilhado.
+
+    Um único pool de conexões (com keep-alive) por event loop evita refazer
+    o handshake TCP/TLS a cada requisição e permite muitas chamadas
+    simultâneas. Em hosts HTTPS com HTTP/2, as chamadas concorrentes são
+    multiplexadas em uma mesma conexão; o Ollama local (http://) segue em
+    HTTP/1.1. O timeout é definido por requisição em cada provider.
+
+    Deve ser chamado de dentro de uma coroutine (usa o loop corrente).
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is not None and not client.is_closed:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            # Descarta clientes de loops que já terminaram
+            for old_loop in [l for l in _clients if l.is_closed()]:
+                del _clients[old_loop]
+            client = _clients[loop] = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_keepalive_connections,
+                    keepalive_expiry=settings.http_keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(120.0),
+                headers={"Accept-Encoding": _ACCEPT_ENCODING},
+                http2=settings.http2_enabled and _HTTP2_AVAILABLE,
+            )
+    return client
+
+
+async def close_shared_async_client() -> None:
+    """Fecha o cliente do loop corrente e descarta os dos demais loops."""
+    with _clients_lock:
+        client = _clients.pop(asyncio.get_running_loop(), None)
+        _clients.clear()
+    if client is not None:
+        await client.aclose()
@@ -6,13 +6,22 @@ Implementa uma interface abstrata e dois providers concretos:
 - HuggingFaceProvider: API de inferência HuggingFace (gratuito com limites)
 """
 
+import asyncio
 import logging
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from functools import cached_property
 from typing import Literal
 
 import httpx
+import orjson
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.singleflight import SingleFlight, make_key
+from app.services.http import get_shared_async_client
 try:
     from google import genai
 except ImportError:
@@ -36,6 +45,12 @@ class ModelNotFoundError(LLMProviderError):
     pass
 
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Gerações cacheadas de providers com temperatura baixa (ver LLMProvider.generate)
+_GENERATION_CACHE = TTLCache(maxsize=settings.llm_cache_size, ttl=settings.llm_cache_ttl)
+
+
 class LLMProvider(ABC):
     """
     Interface abstrata para providers de LLM.
@@ -55,11 +70,18 @@ class LLMProvider(ABC):
         """Nome do modelo em uso."""
         pass
     
-    @abstractmethod
+    # Temperatura de amostragem usada pelo provider (None = padrão do servidor,
+    # desconhecida). Define se as gerações podem ser cacheadas.
+    temperature: float | None = None
+    
     async def generate(self, prompt: str, history: list[dict] | None = None, model_override: str | None = None) -> str:
         """
         Gera uma resposta para o prompt dado.
         
+        Chamadas concorrentes idênticas (mesmo prompt, histórico e modelo)
+        compartilham uma única geração no provider. Com temperatura até
+        LLM_CACHE_MAX_TEMPERATURE, a resposta também é cacheada por LLM_CACHE_TTL.
+        
         Args:
             prompt: Mensagem do usuário
             history: Histórico de mensagens no formato [{"role": "user"|"assistant", "content": "..."}]
@@ -71,11 +93,142 @@ class LLMProvider(ABC):
             ProviderNotAvailableError: Se o provider não estiver acessível
             ModelNotFoundError: Se o modelo não for encontrado
         """
-        pass
+        key = make_key(self.name, model_override or self.model, prompt, history)
+        cacheable = self._cacheable
+        if cacheable:
+            cached = _GENERATION_CACHE.get(key)
+            if cached is not None:
+                return cached
+        
+        reply = await self._inflight.do(
+            key,
+            lambda: self._generate_impl(prompt, history, model_override=model_override),
+        )
+        if cacheable:
+            _GENERATION_CACHE.set(key, reply)
+        return reply
+    
+    @property
+    def _cacheable(self) -> bool:
+        """Se as gerações são determinísticas o bastante para cachear."""
+        return (
+            settings.llm_cache_enabled
+            and self.temperature is not None
+            and self.temperature <= settings.llm_cache_max_temperature
+        )
+    
+    @cached_property
+    def _inflight(self) -> SingleFlight:
+        """Gerações em andamento deste provider, por chave de requisição."""
+        return SingleFlight()
     
     @abstractmethod
+    async def _generate_impl(self, prompt: str, history: list[dict] | None = None, model_override: str | None = None) -> str:
+        """Gera a resposta no provider de fato (sem deduplicação)."""
+        pass
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        history: list[dict] | None = None,
+        model_override: str | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Gera a resposta em partes, à medida que o modelo produz os tokens.
+        
+        A implementação padrão entrega a resposta completa de `generate` em
+        uma única parte; providers com streaming nativo sobrescrevem.
+        """
+        yield await self.generate(prompt, history, model_override=model_override)
+    
+    async def generate_batch(
+        self,
+        prompts: list[str],
+        histories: list[list[dict] | None],
+        model_override: str | None = None,
+    ) -> list[str | BaseException]:
+        """
+        Gera respostas para vários prompts de uma só vez.
+        
+        A implementação padrão dispara as chamadas de `generate` em paralelo.
+        Providers com suporte nativo a lotes podem sobrescrever este método.
+        
+        Args:
+            prompts: Mensagens dos usuários
+            histories: Histórico correspondente a cada prompt (mesma ordem)
+            model_override: Modelo usado para todo o lote
+        
+        Returns:
+            Lista na mesma ordem dos prompts. Falhas individuais são retornadas
+            como a própria exceção, sem derrubar o restante do lote.
+        """
+        return await asyncio.gather(
+            *(
+                self.generate(prompt, history, model_override=model_override)
+                for prompt, history in zip(prompts, histories)
+            ),
+            return_exceptions=True,
+        )
+    
+    # Último resultado de `_check_available` (instante, disponível) e o
+    # probe em andamento, compartilhado por chamadas concorrentes
+    _availability: tuple[float, bool] | None = None
+    _availability_probe: asyncio.Future | None = None
+    
     async def is_available(self) -> bool:
-        """Verifica se o provider está disponível e respondendo."""
+        """
+        Verifica se o provider está disponível e respondendo.
+        
+        O resultado é reaproveitado por HEALTH_CACHE_TTL segundos, e chamadas
+        concorrentes aguardam o mesmo probe: health checks frequentes não
+        viram uma requisição ao servidor do LLM cada um.
+        """
+        cached = self._availability
+        if cached is not None and time.monotonic() - cached[0] < settings.health_cache_ttl:
+            return cached[1]
+        
+        probe = self._availability_probe
+        if probe is None or probe.get_loop() is not asyncio.get_running_loop():
+            probe = asyncio.ensure_future(self._check_available())
+            self._availability_probe = probe
+            probe.add_done_callback(self._record_availability)
+        
+        # shield: um chamador cancelado não cancela o probe dos demais
+        return await asyncio.shield(probe)
+    
+    def _record_availability(self, probe: asyncio.Future) -> None:
+        """Guarda o resultado de um probe concluído (falhas não são cacheadas)."""
+        if self._availability_probe is not probe:
+            return
+        self._availability_probe = None
+        if not probe.cancelled() and probe.exception() is None:
+            self._availability = (time.monotonic(), probe.result())
+    
+    @abstractmethod
+    async def _check_available(self) -> bool:
+        """Consulta o provider de fato (sem cache)."""
+        pass
+    
+    def _unavailable(self, message: str) -> ProviderNotAvailableError:
+        """
+        Erro de indisponibilidade vindo de uma geração.
+        
+        Descarta o resultado cacheado de `is_available`, para o próximo health
+        check consultar o provider em vez de responder "disponível".
+        """
+        self._availability = None
+        return ProviderNotAvailableError(message)
+    
+    async def warmup(self) -> None:
+        """
+        Prepara o provider antes da primeira requisição (ex: abre conexões).
+        
+        Chamado em background no startup; falhas devem ser silenciosas.
+        """
+        pass
+    
+    async def close(self) -> None:
+        """Libera recursos do provider."""
         pass
 
 
@@ -97,11 +250,25 @@ class OllamaProvider(LLMProvider):
         base_url: str = settings.ollama_base_url,
         model_name: str = settings.ollama_model,
         timeout: float = 120.0,  # Modelos pequenos podem demorar na primeira execução
+        client: httpx.AsyncClient | None = None,
     ):
         self._base_url = base_url.rstrip("/")
         self._model_name = model_name
         self._timeout = timeout
-        self._client = httpx.AsyncClient(timeout=timeout)
+        self._client = client  # None = cliente compartilhado (app.services.http)
+        
+        # Prefixo fixo de toda conversa, montado uma única vez. Manter o início
+        # das mensagens idêntico também favorece o cache de prompt do Ollama.
+        self._prefix: tuple[dict, ...] = (
+            ({"role": "system", "content": settings.bot_system_prompt},)
+            if settings.bot_system_prompt
+            else ()
+        )
+    
+    @property
+    def _http(self) -> httpx.AsyncClient:
+        """Cliente HTTP das requisições (o injetado ou o compartilhado)."""
+        return self._client or get_shared_async_client()
     
     @property
     def name(self) -> Literal["ollama", "huggingface"]:
@@ -111,81 +278,129 @@ class OllamaProvider(LLMProvider):
     def model(self) -> str:
         return self._model_name
     
-    async def generate(self, prompt: str, history: list[dict] | None = None, model_override: str | None = None) -> str:
+    def _build_messages(self, prompt: str, history: list[dict] | None) -> list[dict]:
         """
-        Gera resposta usando a API do Ollama.
+        Monta as mensagens no formato esperado pelo /api/chat do Ollama.
         
-        Usa o endpoint /api/chat para suportar histórico de conversa.
+        System prompt (pré-montado) + histórico + mensagem atual, em uma
+        única lista; os dicts do histórico são reaproveitados, não copiados.
         """
-        # Monta as mensagens no formato esperado pelo Ollama
-        messages = []
-        
-        # Adiciona system prompt se configurado
-        if settings.bot_system_prompt:
-            messages.append({
-                "role": "system",
-                "content": settings.bot_system_prompt,
-            })
+        return [*self._prefix, *(history or ()), {"role": "user", "content": prompt}]
+    
+    async def _generate_impl(self, prompt: str, history: list[dict] | None = None, model_override: str | None = None) -> str:
+        """
+        Gera resposta usando a API do Ollama.
         
-        # Adiciona histórico se houver
-        if history:
-            messages.extend(history)
+        Usa o endpoint /api/chat para suportar histórico de conversa. A resposta
+        é recebida em streaming e juntada aqui, então o Ollama começa a enviar
+        tokens assim que os gera (sem segurar a resposta inteira no servidor).
+        """
+        if model_override:
+            logger.info(f"Usando modelo override no Ollama: {model_override}")
         
-        # Adiciona a mensagem atual
-        messages.append({
-            "role": "user",
-            "content": prompt,
-        })
+        parts = [
+            chunk
+            async for chunk in self.generate_stream(prompt, history, model_override=model_override)
+        ]
+        return "".join(parts).strip()
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        history: list[dict] | None = None,
+        model_override: str | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Gera resposta em streaming (NDJSON) usando a API do Ollama.
         
-        # Usa o modelo override se fornecido, caso contrário usa o padrão
+        Cada linha recebida traz um pedaço da mensagem do assistente;
+        `generate` é um wrapper que junta os pedaços.
+        """
+        messages = self._build_messages(prompt, history)
         target_model = model_override if model_override else self._model_name
-
-        if model_override:
-            logger.info(f"Usando modelo override no Ollama: {model_override}")
         
         try:
-            response = await self._client.post(
+            async with self._http.stream(
+                "POST",
                 f"{self._base_url}/api/chat",
-                json={
+                # Corpo serializado com orjson (mais rápido que o codec JSON do httpx)
+                content=orjson.dumps({
                     "model": target_model,
                     "messages": messages,
-                    "stream": False,  # Resposta completa de uma vez
-                },
-            )
-            
-            if response.status_code == 404:
-                raise ModelNotFoundError(
-                    f"Modelo '{target_model}' não encontrado. "
-                    f"Execute: ollama pull {target_model}"
-                )
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            return data.get("message", {}).get("content", "").strip()
-            
+                    "stream": True,
+                    "keep_alive": settings.ollama_keep_alive,  # Evita descarregar o modelo entre chats
+                }),
+                headers=_JSON_HEADERS,
+                timeout=self._timeout,
+            ) as response:
+                if response.status_code == 404:
+                    raise ModelNotFoundError(
+                        f"Modelo '{target_model}' não encontrado. "
+                        f"Execute: ollama pull {target_model}"
+                    )
+                
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = orjson.loads(line)
+                    
+                    # Falhas no meio da geração chegam como uma linha {"error": ...}
+                    if "error" in data:
+                        raise LLMProviderError(f"Erro do Ollama durante a geração: {data['error']}")
+                    
+                    chunk = data.get("message", {}).get("content", "")
+                    if chunk:
+                        yield chunk
+                    if data.get("done"):
+                        break
+        
         except httpx.ConnectError:
-            raise ProviderNotAvailableError(
+            raise self._unavailable(
                 "Não foi possível conectar ao Ollama. "
                 "Verifique se o Ollama está instalado e rodando. "
                 "Execute: ollama serve"
             )
         except httpx.TimeoutException:
-            raise ProviderNotAvailableError(
+            raise self._unavailable(
                 f"Timeout ao aguardar resposta do Ollama (>{self._timeout}s). "
                 "O modelo pode estar carregando. Tente novamente."
             )
     
-    async def is_available(self) -> bool:
+    async def generate_batch(
+        self,
+        prompts: list[str],
+        histories: list[list[dict] | None],
+        model_override: str | None = None,
+    ) -> list[str | BaseException]:
+        """
+        Dispara o lote em paralelo, limitado a `ollama_num_parallel` chamadas.
+        
+        O Ollama decodifica até OLLAMA_NUM_PARALLEL requisições ao mesmo tempo;
+        enviar mais que isso apenas enfileira no servidor.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.ollama_num_parallel))
+        
+        async def bounded(prompt: str, history: list[dict] | None) -> str:
+            async with semaphore:
+                return await self.generate(prompt, history, model_override=model_override)
+        
+        return await asyncio.gather(
+            *(bounded(prompt, history) for prompt, history in zip(prompts, histories)),
+            return_exceptions=True,
+        )
+    
+    async def _check_available(self) -> bool:
         """Verifica se o Ollama está rodando e o modelo está disponível."""
         try:
             # Verifica se o servidor está rodando
-            response = await self._client.get(f"{self._base_url}/api/tags")
+            response = await self._http.get(f"{self._base_url}/api/tags", timeout=self._timeout)
             if response.status_code != 200:
                 return False
             
             # Verifica se o modelo está disponível
-            data = response.json()
+            data = orjson.loads(response.content)
             models = [m.get("name", "") for m in data.get("models", [])]
             
             # Ollama pode retornar "qwen2.5:0.5b" ou "qwen2.5:0.5b-latest"
@@ -196,9 +411,29 @@ class OllamaProvider(LLMProvider):
             logger.debug(f"Ollama not available: {e}")
             return False
     
-    async def close(self):
-        """Fecha o cliente HTTP."""
-        await self._client.aclose()
+    async def warmup(self) -> None:
+        """
+        Carrega o modelo na memória do Ollama antes do primeiro chat.
+        
+        Um /api/generate sem prompt só carrega o modelo (e abre a conexão);
+        assim o primeiro usuário não paga o carregamento a frio.
+        """
+        try:
+            response = await self._http.post(
+                f"{self._base_url}/api/generate",
+                content=orjson.dumps({"model": self._model_name, "keep_alive": settings.ollama_keep_alive}),
+                headers=_JSON_HEADERS,
+                timeout=self._timeout,
+            )
+            response.raise_for_status()
+            logger.info(f"Modelo '{self._model_name}' carregado no Ollama")
+        except Exception as e:
+            logger.debug(f"Warmup do Ollama falhou: {e}")
+
+
+def _gemini_content(role: str, text: str):
+    """Mensagem no formato do Gemini."""
+    return genai.types.Content(role=role, parts=[genai.types.Part.from_text(text=text)])
 
 
 class GoogleGeminiProvider(LLMProvider):
@@ -229,6 +464,19 @@ class GoogleGeminiProvider(LLMProvider):
         self._client = genai.Client(api_key=api_key)
         self._model_name = model_name
         self._timeout = timeout
+        
+        # Uma geração bem-sucedida já prova que a API está acessível
+        self._confirmed = False
+        
+        # A conversa começa com o system prompt (montado uma única vez)
+        self._prefix: tuple = (
+            (
+                _gemini_content("user", f"Instructions: {settings.bot_system_prompt}"),
+                _gemini_content("model", "Entendido."),
+            )
+            if settings.bot_system_prompt
+            else ()
+        )
     
     @property
     def name(self) -> Literal["ollama", "huggingface", "google"]:
@@ -238,62 +486,87 @@ class GoogleGeminiProvider(LLMProvider):
     def model(self) -> str:
         return self._model_name
     
-    async def generate(self, prompt: str, history: list[dict] | None = None, model_override: str | None = None) -> str:
+    def _build_contents(self, prompt: str, history: list[dict] | None) -> list:
+        """
+        Converte system prompt, histórico e mensagem para o formato do Gemini.
+        
+        Usa as roles permitidas pelo Gemini ("user" e "model"). Só o prefixo do
+        system prompt é montado uma única vez (no __init__); histórico e prompt
+        são convertidos a cada chamada.
+        """
+        return [
+            *self._prefix,
+            *(
+                _gemini_content("user" if msg["role"] == "user" else "model", msg["content"])
+                for msg in history or ()
+            ),
+            _gemini_content("user", prompt),
+        ]
+    
+    def _translate_error(self, error: Exception, target_model: str) -> LLMProviderError:
+        """Mapeia erros do SDK para as exceções dos providers."""
+        logger.error(f"Erro no Gemini: {error}")
+        if "404" in str(error) or "not found" in str(error).lower():
+            return ModelNotFoundError(f"Modelo {target_model} não encontrado.")
+        self._confirmed = False
+        return self._unavailable(f"Erro ao acessar Gemini: {error}")
+    
+    async def _generate_impl(self, prompt: str, history: list[dict] | None = None, model_override: str | None = None) -> str:
         """
         Gera resposta usando o SDK do Gemini.
         """
+        target_model = model_override if model_override else self._model_name
+        if model_override:
+            logger.info(f"Usando modelo override no Gemini: {model_override}")
+        
         try:
-            target_model = model_override if model_override else self._model_name
-            if model_override:
-                logger.info(f"Usando modelo override no Gemini: {model_override}")
-            
-            # Converte histórico para o formato do Gemini
-            chat_history = []
-            
-            # O novo SDK usa config para manter histórico se estivermos chamando o generate_content em um loop,
-            # mas o novo modo suporta formatar a string de prompts. 
-            # Como a aplicação envia mensagens iterativas:
-            # "A conversa começa com system prompt e usa a roles permitidas"
-            
-            contents = []
-            if settings.bot_system_prompt:
-                contents.append(genai.types.Content(role="user", parts=[genai.types.Part.from_text(text=f"Instructions: {settings.bot_system_prompt}")]))
-                contents.append(genai.types.Content(role="model", parts=[genai.types.Part.from_text(text="Entendido.")]))
-
-            if history:
-                for msg in history:
-                    role = "user" if msg["role"] == "user" else "model"
-                    contents.append(
-                        genai.types.Content(
-                            role=role,
-                            parts=[genai.types.Part.from_text(text=msg["content"])]
-                        )
-                    )
-            
-            contents.append(
-                genai.types.Content(
-                    role="user",
-                    parts=[genai.types.Part.from_text(text=prompt)]
-                )
-            )
+            contents = self._build_contents(prompt, history)
 
-            # Envia mensagem
-            response = self._client.models.generate_content(
+            # Envia mensagem pelo cliente assíncrono (não bloqueia o event loop)
+            response = await self._client.aio.models.generate_content(
                 model=target_model,
                 contents=contents
             )
+            self._confirmed = True
             return response.text.strip()
             
         except Exception as e:
-            logger.error(f"Erro no Gemini: {e}")
-            if "404" in str(e) or "not found" in str(e).lower():
-                 raise ModelNotFoundError(f"Modelo {self._model_name} não encontrado.")
-            raise ProviderNotAvailableError(f"Erro ao acessar Gemini: {e}")
+            raise self._translate_error(e, target_model)
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        history: list[dict] | None = None,
+        model_override: str | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Gera resposta em streaming usando `generate_content_stream`.
+        """
+        target_model = model_override if model_override else self._model_name
+        
+        try:
+            stream = await self._client.aio.models.generate_content_stream(
+                model=target_model,
+                contents=self._build_contents(prompt, history),
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+            self._confirmed = True
+        
+        except Exception as e:
+            raise self._translate_error(e, target_model)
 
-    async def is_available(self) -> bool:
-        """Tenta listar modelos para verificar acesso."""
+    async def _check_available(self) -> bool:
+        """
+        Disponível se já houve uma geração bem-sucedida (sem chamada à API).
+        
+        Antes disso, tenta listar modelos (em thread: a listagem do SDK é síncrona).
+        """
+        if self._confirmed:
+            return True
         try:
-            next(self._client.models.list())
+            await asyncio.to_thread(lambda: next(iter(self._client.models.list())))
             return True
         except Exception:
             return False
@@ -315,11 +588,19 @@ class HuggingFaceProvider(LLMProvider):
     
     INFERENCE_API_URL = "https://api-inference.huggingface.co/models"
     
+    # Parâmetros de geração fixos (a temperatura é configurável por instância)
+    DEFAULT_PARAMETERS = {
+        "max_new_tokens": 256,
+        "return_full_text": False,
+    }
+    
     def __init__(
         self,
         token: str | None = settings.hf_token,
         model_name: str = settings.hf_model,
         timeout: float = 60.0,
+        temperature: float = settings.hf_temperature,
+        client: httpx.AsyncClient | None = None,
     ):
         if not token:
             raise ValueError(
@@ -331,11 +612,27 @@ class HuggingFaceProvider(LLMProvider):
         self._token = token
         self._model_name = model_name
         self._timeout = timeout
-        self._client = httpx.AsyncClient(
-            timeout=timeout,
-            headers={"Authorization": f"Bearer {token}"},
+        self._headers = {"Authorization": f"Bearer {token}"}
+        self._json_headers = {**self._headers, "Content-Type": "application/json"}
+        self._client = client  # None = cliente compartilhado (app.services.http)
+        
+        # Temperatura 0 = decodificação gulosa (a API rejeita amostragem com temperatura 0)
+        self.temperature = temperature
+        self._parameters = {
+            **self.DEFAULT_PARAMETERS,
+            **({"temperature": temperature, "do_sample": True} if temperature > 0 else {"do_sample": False}),
+        }
+        
+        # Início fixo de todo prompt, montado uma única vez
+        self._system_prefix = (
+            f"[Sistema]: {settings.bot_system_prompt}\n\n" if settings.bot_system_prompt else ""
         )
     
+    @property
+    def _http(self) -> httpx.AsyncClient:
+        """Cliente HTTP das requisições (o injetado ou o compartilhado)."""
+        return self._client or get_shared_async_client()
+    
     @property
     def name(self) -> Literal["ollama", "huggingface"]:
         return "huggingface"
@@ -344,45 +641,57 @@ class HuggingFaceProvider(LLMProvider):
     def model(self) -> str:
         return self._model_name
     
-    async def generate(self, prompt: str, history: list[dict] | None = None, model_override: str | None = None) -> str:
+    def _build_prompt(self, prompt: str, history: list[dict] | None) -> str:
         """
-        Gera resposta usando a API de Inferência do HuggingFace.
+        Monta o prompt em texto incluindo o histórico recente.
         
-        Nota: A API de inferência gratuita é simplificada e pode não suportar
-        todos os recursos de chat avançados.
+        O histórico entra das mensagens mais recentes para as mais antigas até
+        esgotar `hf_history_char_budget`, para não estourar o contexto do modelo
+        (uma única mensagem longa não empurra o prompt além do limite).
         """
-        # Monta o prompt incluindo histórico básico
-        full_prompt = ""
-        
-        # Adiciona system prompt
-        if settings.bot_system_prompt:
-            full_prompt += f"[Sistema]: {settings.bot_system_prompt}\n\n"
+        parts = [self._system_prefix]
         
         # Adiciona histórico resumido
         if history:
-            for msg in history[-4:]:  # Últimas 4 mensagens para não estourar contexto
-                role = "Usuário" if msg["role"] == "user" else "Assistente"
-                full_prompt += f"[{role}]: {msg['content']}\n"
+            budget = settings.hf_history_char_budget
+            recent: list[str] = []
+            for msg in reversed(history):
+                label = "[Usuário]: " if msg["role"] == "user" else "[Assistente]: "
+                line = f"{label}{msg['content']}\n"
+                budget -= len(line)
+                if budget < 0:
+                    break
+                recent.append(line)
+            parts.extend(reversed(recent))
         
         # Adiciona mensagem atual
-        full_prompt += f"[Usuário]: {prompt}\n[Assistente]:"
+        parts.append(f"[Usuário]: {prompt}\n[Assistente]:")
+        
+        return "".join(parts)
+    
+    async def _generate_impl(self, prompt: str, history: list[dict] | None = None, model_override: str | None = None) -> str:
+        """
+        Gera resposta usando a API de Inferência do HuggingFace.
+        
+        Nota: A API de inferência gratuita é simplificada e pode não suportar
+        todos os recursos de chat avançados.
+        """
+        full_prompt = self._build_prompt(prompt, history)
         
         try:
-            response = await self._client.post(
+            # Corpo serializado com orjson (mais rápido que o codec JSON do httpx)
+            response = await self._http.post(
                 f"{self.INFERENCE_API_URL}/{self._model_name}",
-                json={
+                content=orjson.dumps({
                     "inputs": full_prompt,
-                    "parameters": {
-                        "max_new_tokens": 256,
-                        "temperature": 0.7,
-                        "do_sample": True,
-                        "return_full_text": False,
-                    },
-                },
+                    "parameters": self._parameters,
+                }),
+                headers=self._json_headers,
+                timeout=self._timeout,
             )
             
             if response.status_code == 401:
-                raise ProviderNotAvailableError(
+                raise self._unavailable(
                     "Token HuggingFace inválido ou expirado. "
                     "Verifique seu HF_TOKEN."
                 )
@@ -393,13 +702,13 @@ class HuggingFaceProvider(LLMProvider):
                 )
             
             if response.status_code == 503:
-                raise ProviderNotAvailableError(
+                raise self._unavailable(
                     f"Modelo '{self._model_name}' está carregando. "
                     "Aguarde alguns segundos e tente novamente."
                 )
             
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # A resposta pode vir em diferentes formatos
             if isinstance(data, list) and len(data) > 0:
@@ -410,21 +719,23 @@ class HuggingFaceProvider(LLMProvider):
             return str(data).strip()
             
         except httpx.ConnectError:
-            raise ProviderNotAvailableError(
+            raise self._unavailable(
                 "Não foi possível conectar à API do HuggingFace. "
                 "Verifique sua conexão com a internet."
             )
         except httpx.TimeoutException:
-            raise ProviderNotAvailableError(
+            raise self._unavailable(
                 "Timeout ao aguardar resposta do HuggingFace."
             )
     
-    async def is_available(self) -> bool:
+    async def _check_available(self) -> bool:
         """Verifica se a API do HuggingFace está acessível."""
         try:
             # Faz uma requisição simples para verificar conectividade
-            response = await self._client.get(
+            response = await self._http.get(
                 f"{self.INFERENCE_API_URL}/{self._model_name}",
+                headers=self._headers,
+                timeout=self._timeout,
             )
             # 200 = ok, 503 = modelo carregando (mas API funciona)
             return response.status_code in (200, 503)
@@ -432,9 +743,12 @@ class HuggingFaceProvider(LLMProvider):
             logger.debug(f"HuggingFace not available: {e}")
             return False
     
-    async def close(self):
-        """Fecha o cliente HTTP."""
-        await self._client.aclose()
+    async def warmup(self) -> None:
+        """Estabelece a conexão TLS com a API antes do primeiro chat."""
+        try:
+            await self._http.head(self.INFERENCE_API_URL, timeout=5.0)
+        except Exception as e:
+            logger.debug(f"Warmup do HuggingFace falhou: {e}")
 
 
 # ==========================================
@@ -442,6 +756,7 @@ class HuggingFaceProvider(LLMProvider):
 # ==========================================
 
 _provider_instance: LLMProvider | None = None
+_provider_lock = threading.Lock()
 
 
 def get_llm_provider() -> LLMProvider:
@@ -462,11 +777,22 @@ def get_llm_provider() -> LLMProvider:
     if _provider_instance is not None:
         return _provider_instance
     
+    # Check-and-set sob lock: requisições simultâneas no cold start (threadpool)
+    # não podem criar dois providers
+    with _provider_lock:
+        if _provider_instance is None:
+            _provider_instance = _create_provider()
+    
+    return _provider_instance
+
+
+def _create_provider() -> LLMProvider:
+    """Instancia o provider conforme LLM_PROVIDER."""
     provider_name = settings.llm_provider.lower()
     
     if provider_name == "ollama":
         logger.info(f"Inicializando Ollama provider com modelo: {settings.ollama_model}")
-        _provider_instance = OllamaProvider()
+        return OllamaProvider()
     
     elif provider_name == "huggingface":
         if not settings.hf_token:
@@ -475,7 +801,7 @@ def get_llm_provider() -> LLMProvider:
                 "Defina HF_TOKEN no .env ou use LLM_PROVIDER=ollama"
             )
         logger.info(f"Inicializando HuggingFace provider com modelo: {settings.hf_model}")
-        _provider_instance = HuggingFaceProvider()
+        return HuggingFaceProvider()
 
     elif provider_name == "google":
         if not settings.gemini_api_key:
@@ -484,20 +810,71 @@ def get_llm_provider() -> LLMProvider:
                 "Defina GEMINI_API_KEY no .env"
             )
         logger.info(f"Inicializando Gemini provider com modelo: {settings.gemini_model}")
-        _provider_instance = GoogleGeminiProvider()
+        return GoogleGeminiProvider()
     
     else:
         raise ValueError(
             f"Provider '{provider_name}' não reconhecido. "
             "Use 'ollama', 'huggingface' ou 'google'."
         )
+
+
+# Providers instanciados só para probe (os que não são o ativo)
+_probe_instances: dict[str, LLMProvider] = {}
+
+
+def _configured_providers() -> dict[str, LLMProvider]:
+    """
+    Providers com credenciais configuradas, reaproveitando as instâncias.
     
-    return _provider_instance
+    O provider ativo é o mesmo de `get_llm_provider` (e do seu cache de
+    disponibilidade); os demais são criados uma vez e guardados.
+    """
+    candidates = {"ollama": OllamaProvider}
+    if settings.hf_token:
+        candidates["huggingface"] = HuggingFaceProvider
+    if settings.gemini_api_key and genai is not None:
+        candidates["google"] = GoogleGeminiProvider
+    
+    active = get_llm_provider()
+    providers = {}
+    for name, provider_class in candidates.items():
+        if name == active.name:
+            providers[name] = active
+        else:
+            if name not in _probe_instances:
+                _probe_instances[name] = provider_class()
+            providers[name] = _probe_instances[name]
+    return providers
+
+
+async def probe_all_providers() -> dict[str, bool]:
+    """
+    Verifica todos os providers configurados em paralelo.
+    
+    Os probes rodam juntos (asyncio.gather), então a latência total é a do
+    provider mais lento, não a soma. Falhas contam como indisponível.
+    
+    Returns:
+        Dict {nome do provider: disponível}, na ordem ollama, huggingface, google
+    """
+    providers = _configured_providers()
+    results = await asyncio.gather(
+        *(provider.is_available() for provider in providers.values()),
+        return_exceptions=True,
+    )
+    return {
+        name: result is True
+        for name, result in zip(providers, results)
+    }
 
 
 async def close_provider():
-    """Fecha o provider e libera recursos."""
+    """Fecha os providers (o cliente HTTP compartilhado é fechado no shutdown da aplicação)."""
     global _provider_instance
     if _provider_instance is not None:
         await _provider_instance.close()
         _provider_instance = None
+    for provider in _probe_instances.values():
+        await provider.close()
+    _probe_instances.clear()
@@ -6,14 +6,18 @@ Implementa armazenamento de histórico por sessão com duas opções:
 - SQLiteMemoryManager: persiste em banco SQLite local
 """
 
+import itertools
 import logging
+import queue
 import sqlite3
 import json
+import threading
 from abc import ABC, abstractmethod
-from collections import defaultdict
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import TypedDict
+from typing import Iterator, TypedDict
 
 from app.core.config import settings
 
@@ -34,6 +38,10 @@ class MemoryManager(ABC):
     Define operações básicas para armazenar e recuperar histórico.
     """
     
+    # Se as operações fazem I/O bloqueante (disco); nesse caso as rotas
+    # as chamam pelo threadpool em vez de direto no event loop
+    blocking_io: bool = False
+    
     @abstractmethod
     def add_message(self, session_id: str, role: str, content: str) -> None:
         """
@@ -60,30 +68,81 @@ class MemoryManager(ABC):
         """
         pass
     
+    @abstractmethod
     def get_formatted_history(self, session_id: str) -> list[dict]:
         """
         Retorna histórico formatado para o provider LLM.
         
+        Implementado por cada backend direto do seu armazenamento, sem
+        montar as `Message` completas (com timestamp) para descartá-las.
+        
         Args:
             session_id: Identificador da sessão
         
         Returns:
             Lista de dicts com {"role": "...", "content": "..."}
         """
-        history = self.get_history(session_id, limit=settings.memory_max_messages)
-        return [{"role": msg["role"], "content": msg["content"]} for msg in history]
+        pass
     
     @abstractmethod
     def clear_session(self, session_id: str) -> None:
         """Remove todo o histórico de uma sessão."""
         pass
     
+    def flush(self, session_id: str | None = None) -> None:
+        """
+        Aguarda a gravação das mensagens pendentes (managers com escrita assíncrona).
+        
+        Com `session_id`, aguarda só as daquela sessão.
+        """
+        pass
+    
     @abstractmethod
     def close(self) -> None:
         """Libera recursos (conexões, arquivos, etc)."""
         pass
 
 
+class _SessionColumns:
+    """
+    Histórico de uma sessão em colunas (roles, contents, timestamps).
+    
+    Três deques paralelos em vez de um dict por mensagem: bem menos memória
+    por mensagem guardada, e o histórico para o provider nem toca nos
+    timestamps. As `Message` só são montadas quando pedidas.
+    """
+    
+    __slots__ = ("roles", "contents", "timestamps")
+    
+    def __init__(self, max_messages: int):
+        # deque(maxlen): ao passar do limite, a mensagem mais antiga sai em O(1)
+        self.roles: deque[str] = deque(maxlen=max_messages)
+        self.contents: deque[str] = deque(maxlen=max_messages)
+        self.timestamps: deque[str] = deque(maxlen=max_messages)
+    
+    def append(self, role: str, content: str, timestamp: str) -> None:
+        self.roles.append(role)
+        self.contents.append(content)
+        self.timestamps.append(timestamp)
+    
+    def messages(self, limit: int | None = None) -> list[Message]:
+        """As últimas `limit` mensagens (todas, se None), em ordem cronológica."""
+        start = 0 if limit is None else max(0, len(self.roles) - limit)
+        return [
+            {"role": role, "content": content, "timestamp": timestamp}
+            for role, content, timestamp in itertools.islice(
+                zip(self.roles, self.contents, self.timestamps), start, None
+            )
+        ]
+    
+    def formatted(self) -> list[dict]:
+        """Histórico no formato do provider (sem timestamps)."""
+        return [
+            {"role": role, "content": content}
+            for role, content in zip(self.roles, self.contents)
+        ]
+
+
 class InMemoryManager(MemoryManager):
     """
     Gerenciador de memória em RAM.
@@ -91,43 +150,89 @@ class InMemoryManager(MemoryManager):
     - Rápido e simples
     - Perde dados ao reiniciar o servidor
     - Ideal para desenvolvimento e testes
+    - Mantém no máximo `max_sessions` sessões, descartando as usadas há
+      mais tempo (LRU), para a memória não crescer sem limite
+    - Cada sessão guarda o histórico em colunas (ver `_SessionColumns`)
     """
     
-    def __init__(self, max_messages: int = settings.memory_max_messages):
+    def __init__(
+        self,
+        max_messages: int = settings.memory_max_messages,
+        max_sessions: int = settings.memory_max_sessions,
+    ):
         self._max_messages = max_messages
-        self._sessions: dict[str, list[Message]] = defaultdict(list)
-        logger.info(f"InMemoryManager inicializado (max_messages={max_messages})")
+        self._max_sessions = max_sessions
+        self._sessions: OrderedDict[str, _SessionColumns] = OrderedDict()
+        self._lock = threading.Lock()
+        logger.info(
+            f"InMemoryManager inicializado (max_messages={max_messages}, max_sessions={max_sessions})"
+        )
+    
+    def _touch(self, session_id: str) -> _SessionColumns | None:
+        """Sessão existente, marcada como usada agora (chamar com o lock)."""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        return session
     
     def add_message(self, session_id: str, role: str, content: str) -> None:
         """Adiciona mensagem e mantém apenas as últimas N."""
-        message: Message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-        }
-        
-        self._sessions[session_id].append(message)
+        timestamp = datetime.now().isoformat()
         
-        # Mantém apenas as últimas N mensagens
-        if len(self._sessions[session_id]) > self._max_messages:
-            self._sessions[session_id] = self._sessions[session_id][-self._max_messages:]
+        with self._lock:
+            session = self._touch(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _SessionColumns(self._max_messages)
+                # Descarta a sessão usada há mais tempo
+                if len(self._sessions) > self._max_sessions:
+                    self._sessions.popitem(last=False)
+            
+            session.append(role, content, timestamp)
     
     def get_history(self, session_id: str, limit: int | None = None) -> list[Message]:
         """Retorna histórico da sessão."""
-        history = self._sessions.get(session_id, [])
-        if limit is not None:
-            return history[-limit:]
-        return history.copy()
+        with self._lock:
+            session = self._touch(session_id)
+            return [] if session is None else session.messages(limit)
+    
+    def get_formatted_history(self, session_id: str) -> list[dict]:
+        """Histórico no formato do provider, sem passar pelos timestamps."""
+        with self._lock:
+            session = self._touch(session_id)
+            return [] if session is None else session.formatted()
     
     def clear_session(self, session_id: str) -> None:
         """Limpa histórico da sessão."""
-        if session_id in self._sessions:
-            del self._sessions[session_id]
+        with self._lock:
+            removed = self._sessions.pop(session_id, None)
+        if removed is not None:
             logger.debug(f"Sessão '{session_id}' limpa")
     
     def close(self) -> None:
         """Limpa toda a memória."""
-        self._sessions.clear()
+        with self._lock:
+            self._sessions.clear()
+
+
+# Aplicados em toda conexão: WAL deixa leitores e o escritor trabalharem em
+# paralelo e synchronous=NORMAL evita um fsync por commit (seguro em WAL)
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
+)
+
+
+def _message_from_row(cursor: sqlite3.Cursor, row: tuple) -> Message:
+    """Row factory das leituras: (role, content, timestamp) -> Message."""
+    return {"role": row[0], "content": row[1], "timestamp": row[2]}
+
+
+def _formatted_from_row(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    """Row factory do histórico para o provider: (role, content) -> dict."""
+    return {"role": row[0], "content": row[1]}
 
 
 class SQLiteMemoryManager(MemoryManager):
@@ -137,8 +242,21 @@ class SQLiteMemoryManager(MemoryManager):
     - Persiste conversas entre reinicializações
     - Arquivo local, sem dependências externas
     - Ideal para produção leve
+    - Modo WAL: uma conexão de escrita (serializada por lock) e uma
+      conexão de leitura por thread, que não bloqueiam a escrita nem
+      umas às outras
+    - Timestamp e poda do histórico feitos pelo próprio SQLite (DEFAULT e
+      trigger): cada mensagem é um único INSERT
+    - Escrita em background (write-behind): `add_message` só enfileira, e
+      uma thread grava as mensagens pendentes em lote, em uma transação.
+      Leituras de uma sessão aguardam as gravações pendentes dela
     """
     
+    # Máximo de mensagens gravadas por transação
+    _WRITE_BATCH_MAX = 256
+    
+    blocking_io = True
+    
     def __init__(
         self,
         db_path: str = settings.sqlite_path,
@@ -150,91 +268,212 @@ class SQLiteMemoryManager(MemoryManager):
         # Cria diretório se não existir
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Conecta e cria tabela
-        self._conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
+        # Conexão de escrita e tabelas
+        self._conn = self._connect()
+        self._write_lock = threading.Lock()
         self._create_tables()
         
+        # Conexões de leitura, criadas sob demanda uma por thread
+        self._local = threading.local()
+        self._all_readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        
+        # Fila de escrita e mensagens ainda não gravadas, por sessão
+        self._write_queue: queue.SimpleQueue[tuple[str, str, str] | None] = queue.SimpleQueue()
+        self._unflushed: dict[str, int] = {}
+        self._flushed = threading.Condition()
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-writer", daemon=True)
+        self._writer.start()
+        
         logger.info(f"SQLiteMemoryManager inicializado: {self._db_path}")
     
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Abre uma conexão com os PRAGMAs de desempenho aplicados.
+        
+        Em modo autocommit (isolation_level=None): leituras não abrem
+        transação implícita e as escritas usam `_transaction`.
+        """
+        conn = sqlite3.connect(str(self._db_path), check_same_thread=False, isolation_level=None)
+        for pragma in _SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _reader(self) -> sqlite3.Connection:
+        """Conexão de leitura da thread corrente (aberta no primeiro uso)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            conn.row_factory = _message_from_row
+            with self._readers_lock:
+                self._all_readers.append(conn)
+        return conn
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Transação de escrita (BEGIN IMMEDIATE), serializada pelo lock.
+        
+        IMMEDIATE reserva a escrita já no início, em vez de no primeiro
+        INSERT/DELETE, evitando SQLITE_BUSY no meio da transação.
+        """
+        with self._write_lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+    
     def _create_tables(self) -> None:
         """Cria tabelas necessárias se não existirem."""
-        cursor = self._conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT NOT NULL,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_session_id ON messages(session_id)
-        """)
-        self._conn.commit()
+        with self._transaction() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    timestamp TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')),
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Índice de cobertura: get_history é respondido só pelo índice, sem
+            # acessar a tabela (substitui o antigo índice só em session_id)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_session_cover
+                ON messages(session_id, id DESC, role, content, timestamp)
+            """)
+            cursor.execute("DROP INDEX IF EXISTS idx_session_id")
+            # Mantém só as últimas N mensagens da sessão a cada INSERT. Recriada
+            # no startup porque N (max_messages) vem da configuração
+            cursor.execute("DROP TRIGGER IF EXISTS prune_session")
+            cursor.execute(f"""
+                CREATE TRIGGER prune_session AFTER INSERT ON messages
+                BEGIN
+                    DELETE FROM messages
+                    WHERE session_id = NEW.session_id
+                    AND id <= (
+                        SELECT id FROM messages
+                        WHERE session_id = NEW.session_id
+                        ORDER BY id DESC
+                        LIMIT 1 OFFSET {int(self._max_messages)}
+                    );
+                END
+            """)
     
     def add_message(self, session_id: str, role: str, content: str) -> None:
-        """Adiciona mensagem ao banco."""
-        cursor = self._conn.cursor()
-        
-        # Insere nova mensagem
-        cursor.execute(
-            "INSERT INTO messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
-            (session_id, role, content, datetime.now().isoformat()),
-        )
-        
-        # Remove mensagens antigas além do limite
-        cursor.execute("""
-            DELETE FROM messages 
-            WHERE session_id = ? 
-            AND id NOT IN (
-                SELECT id FROM messages 
-                WHERE session_id = ? 
-                ORDER BY id DESC 
-                LIMIT ?
-            )
-        """, (session_id, session_id, self._max_messages))
-        
-        self._conn.commit()
+        """Enfileira a mensagem para gravação pela thread de escrita."""
+        with self._flushed:
+            self._unflushed[session_id] = self._unflushed.get(session_id, 0) + 1
+        self._write_queue.put((session_id, role, content))
+    
+    def _write_loop(self) -> None:
+        """Thread de escrita: grava o que estiver na fila, em lotes."""
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                return
+            
+            batch = [item]
+            stop = False
+            while len(batch) < self._WRITE_BATCH_MAX:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            self._write_batch(batch)
+            if stop:
+                return
+    
+    def _write_batch(self, batch: list[tuple[str, str, str]]) -> None:
+        """Grava um lote em uma única transação e libera quem aguardava."""
+        try:
+            with self._transaction() as cursor:
+                # O timestamp é gerado pelo SQLite (na expressão, e não só no DEFAULT,
+                # para valer também em bancos criados antes do DEFAULT existir) e o
+                # trigger prune_session remove as mensagens além do limite
+                cursor.executemany(
+                    "INSERT INTO messages (session_id, role, content, timestamp) "
+                    "VALUES (?, ?, ?, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))",
+                    batch,
+                )
+        except Exception:
+            logger.exception(f"Falha ao gravar {len(batch)} mensagens no SQLite")
+        finally:
+            with self._flushed:
+                for session_id, _, _ in batch:
+                    remaining = self._unflushed[session_id] - 1
+                    if remaining:
+                        self._unflushed[session_id] = remaining
+                    else:
+                        del self._unflushed[session_id]
+                self._flushed.notify_all()
+    
+    def _wait_flushed(self, session_id: str | None = None) -> None:
+        """Aguarda as gravações pendentes da sessão (ou de todas, se None)."""
+        with self._flushed:
+            if session_id is None:
+                self._flushed.wait_for(lambda: not self._unflushed)
+            else:
+                self._flushed.wait_for(lambda: session_id not in self._unflushed)
+    
+    def flush(self, session_id: str | None = None) -> None:
+        """Aguarda a gravação das mensagens enfileiradas (da sessão ou de todas)."""
+        self._wait_flushed(session_id)
     
     def get_history(self, session_id: str, limit: int | None = None) -> list[Message]:
         """Recupera histórico do banco."""
-        cursor = self._conn.cursor()
-        
-        if limit is not None:
-            cursor.execute(
-                "SELECT role, content, timestamp FROM messages "
-                "WHERE session_id = ? ORDER BY id DESC LIMIT ?",
-                (session_id, limit),
-            )
-        else:
-            cursor.execute(
-                "SELECT role, content, timestamp FROM messages "
-                "WHERE session_id = ? ORDER BY id",
-                (session_id,),
-            )
+        self._wait_flushed(session_id)
         
-        rows = cursor.fetchall()
+        # O banco pode ter sido podado com outro max_messages
+        limit = self._max_messages if limit is None else min(limit, self._max_messages)
         
-        # Se usou LIMIT, precisa inverter a ordem
-        if limit is not None:
-            rows = list(reversed(rows))
+        # As mais recentes (DESC + LIMIT) já devolvidas em ordem cronológica
+        return self._reader().execute(
+            "WITH recent AS ("
+            " SELECT id, role, content, timestamp FROM messages"
+            " WHERE session_id = ? ORDER BY id DESC LIMIT ?"
+            ") SELECT role, content, timestamp FROM recent ORDER BY id",
+            (session_id, limit),
+        ).fetchall()
+    
+    def get_formatted_history(self, session_id: str) -> list[dict]:
+        """Histórico no formato do provider, lendo só role e content."""
+        self._wait_flushed(session_id)
         
-        return [
-            {"role": row[0], "content": row[1], "timestamp": row[2]}
-            for row in rows
-        ]
+        cursor = self._reader().cursor()
+        cursor.row_factory = _formatted_from_row
+        return cursor.execute(
+            "WITH recent AS ("
+            " SELECT id, role, content FROM messages"
+            " WHERE session_id = ? ORDER BY id DESC LIMIT ?"
+            ") SELECT role, content FROM recent ORDER BY id",
+            (session_id, self._max_messages),
+        ).fetchall()
     
     def clear_session(self, session_id: str) -> None:
         """Remove histórico da sessão do banco."""
-        cursor = self._conn.cursor()
-        cursor.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
-        self._conn.commit()
+        self._wait_flushed(session_id)
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
         logger.debug(f"Sessão '{session_id}' removida do banco")
     
     def close(self) -> None:
-        """Fecha conexão com o banco."""
+        """Grava as mensagens pendentes e fecha as conexões com o banco."""
+        self._write_queue.put(None)
+        self._writer.join()
+        with self._readers_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
         self._conn.close()
 
 
@@ -2,23 +2,51 @@
 Serviço de Personas para mensagens proativas.
 """
 
+import asyncio
 import logging
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Protocol, Tuple
 
-from app.services.llm_provider import get_llm_provider, LLMProviderError
-from app.rag.retriever import get_relevant_context
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.services.llm_provider import LLMProvider, get_llm_provider, LLMProviderError
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Mensagens proativas simultâneas compartilham a mesma busca RAG
+_RAG_FLIGHT = SingleFlight()
+
+# Mensagens proativas repetidas (mesma persona, perfil, override e modelo)
+# reaproveitam a geração: cache com TTL + coalescência das simultâneas
+_PROACTIVE_CACHE = TTLCache(
+    maxsize=settings.proactive_cache_size, ttl=settings.proactive_cache_ttl
+)
+_PROACTIVE_FLIGHT = SingleFlight()
+
+
+def clear_proactive_cache() -> None:
+    """Descarta as mensagens proativas em cache."""
+    _PROACTIVE_CACHE.clear()
+
+
+class PersonaOverride(Protocol):
+    """Override da persona (ex: `app.models.schemas.PersonaOverride`)."""
+
+    description: Optional[str]
+    system_prompt: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
 class Persona:
     id: str
     name: str
     description: str
     system_prompt: str
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TargetProfile:
     id: str
     name: str
@@ -26,7 +54,7 @@ class TargetProfile:
     context: str
 
 # Configuração das 3 personas (tons) do Bot
-PERSONAS = [
+PERSONAS: Tuple[Persona, ...] = (
     Persona(
         id="provocador",
         name="Provocador",
@@ -59,11 +87,11 @@ PERSONAS = [
             "Você faz piada com o desperdício e trata a economia como algo óbvio que o usuário está 'lentamente' percebendo. "
             "Use gírias e humor."
         )
-    )
-]
+    ),
+)
 
 # Configuração dos 3 perfis de usuários alvo
-TARGET_PROFILES = [
+TARGET_PROFILES: Tuple[TargetProfile, ...] = (
     TargetProfile(
         id="gastao",
         name="O Gastão Sem Noção",
@@ -81,39 +109,62 @@ TARGET_PROFILES = [
         name="O Engajado",
         description="Interage e busca economia.",
         context="O usuário já economiza, interage sempre com o app e busca novas formas de otimizar. Ele é um parceiro na missão de eficiência."
+    ),
+)
+
+# Índices por id para as buscas (as listas acima seguem sendo a fonte para /personas)
+_PERSONAS_BY_ID: Dict[str, Persona] = {p.id: p for p in PERSONAS}
+_PROFILES_BY_ID: Dict[str, TargetProfile] = {t.id: t for t in TARGET_PROFILES}
+
+# Prompt proativo = [persona + instrução] (fixo) + [RAG] + [perfil alvo]:
+# a parte fixa vem primeiro para ser um prefixo estável, que os providers
+# (cache de prefixo/KV do Ollama, Gemini) reaproveitam entre chamadas
+_PROACTIVE_INSTRUCTION = (
+    "Gere uma notificação curta (push notification) de 1 a 2 frases para o celular do usuário. "
+    "Seja direto e mantenha sua personalidade intrínseca.\n"
+)
+
+def _proactive_prefix(system_prompt: str) -> str:
+    return f"Atue com a seguinte persona:\n{system_prompt}\n\n{_PROACTIVE_INSTRUCTION}"
+
+_PROACTIVE_PREFIX_BY_ID: Dict[str, str] = {
+    p.id: _proactive_prefix(p.system_prompt) for p in PERSONAS
+}
+_TARGET_CONTEXT_BY_ID: Dict[str, str] = {
+    t.id: (
+        f"\nCONTEXTO DO USUÁRIO ALVO:\n"
+        f"Nome do Perfil: {t.name}\n"
+        f"Descrição: {t.context}\n"
+        "Adapte sua mensagem especificamente para este tipo de usuário, tentando engajá-lo da melhor forma possível dado o seu comportamento."
     )
-]
+    for t in TARGET_PROFILES
+}
 
 class PersonaService:
     @staticmethod
-    def get_personas() -> List[Persona]:
+    def get_personas() -> Tuple[Persona, ...]:
         return PERSONAS
 
     @staticmethod
     def get_persona_by_id(persona_id: str) -> Optional[Persona]:
-        for persona in PERSONAS:
-            if persona.id == persona_id:
-                return persona
-        return None
+        return _PERSONAS_BY_ID.get(persona_id)
 
     @staticmethod
-    def get_target_profiles() -> List[TargetProfile]:
+    def get_target_profiles() -> Tuple[TargetProfile, ...]:
         return TARGET_PROFILES
 
     @staticmethod
     def get_target_profile_by_id(profile_id: str) -> Optional[TargetProfile]:
-        for profile in TARGET_PROFILES:
-            if profile.id == profile_id:
-                return profile
-        return None
+        return _PROFILES_BY_ID.get(profile_id)
 
     @staticmethod
     async def generate_proactive_message(
         persona_id: str, 
         target_profile_id: Optional[str] = None,
-        persona_override: Optional[object] = None, 
+        persona_override: Optional[PersonaOverride] = None, 
         model_override: Optional[str] = None,
-        use_rag: bool = True
+        use_rag: bool = True,
+        provider: Optional[LLMProvider] = None,
     ) -> str:
         """
         Gera uma mensagem proativa baseada na persona escolhida e no perfil do usuário alvo.
@@ -123,38 +174,176 @@ class PersonaService:
             target_profile_id: ID do perfil do usuário alvo (opcional).
             persona_override: Objeto com description e system_prompt opcionais.
             model_override: Nome do modelo para usar.
+            provider: Provider a usar (padrão: o configurado, via get_llm_provider).
+        """
+        key, prefix, target_context = PersonaService._resolve_proactive(
+            persona_id, target_profile_id, persona_override, model_override, use_rag
+        )
+        cached = _PROACTIVE_CACHE.get(key)
+        if cached is not None:
+            return cached
+        
+        message = await _PROACTIVE_FLIGHT.do(
+            key,
+            lambda: PersonaService._generate_proactive(
+                persona_id, prefix, target_context, model_override, use_rag, provider
+            ),
+        )
+        _PROACTIVE_CACHE.set(key, message)
+        return message
+
+    @staticmethod
+    async def generate_proactive_message_stream(
+        persona_id: str,
+        target_profile_id: Optional[str] = None,
+        persona_override: Optional[PersonaOverride] = None,
+        model_override: Optional[str] = None,
+        use_rag: bool = True,
+        provider: Optional[LLMProvider] = None,
+    ) -> AsyncIterator[str]:
         """
-        persona = PersonaService.get_persona_by_id(persona_id)
-        if not persona:
+        Versão em streaming de `generate_proactive_message` (mesmos argumentos).
+        
+        Transmite os chunks do provider conforme são gerados; a mensagem completa
+        entra no mesmo cache da versão sem streaming. Um acerto no cache é
+        entregue como um único chunk.
+        """
+        key, prefix, target_context = PersonaService._resolve_proactive(
+            persona_id, target_profile_id, persona_override, model_override, use_rag
+        )
+        cached = _PROACTIVE_CACHE.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        if provider is None:
+            provider = get_llm_provider()
+        prompt = await PersonaService._build_proactive_prompt(prefix, target_context, use_rag)
+        
+        parts = []
+        try:
+            async for chunk in provider.generate_stream(prompt, model_override=model_override):
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"Erro ao gerar mensagem proativa para {persona_id}: {e}")
+            raise LLMProviderError(f"Falha na geração de mensagem: {e}")
+        # Mesmo valor que a versão sem streaming guarda para a mesma chave
+        _PROACTIVE_CACHE.set(key, "".join(parts).strip())
+
+    @staticmethod
+    async def generate_proactive_messages_by_persona(
+        persona_id: str,
+        target_profile_ids: List[Optional[str]],
+        persona_override: Optional[PersonaOverride] = None,
+        model_override: Optional[str] = None,
+        use_rag: bool = True,
+        provider: Optional[LLMProvider] = None,
+    ) -> List[Any]:
+        """
+        Gera as mensagens de uma persona para vários perfis alvo em um único lote.
+        
+        Todos os prompts compartilham o mesmo prefixo (persona + instrução + RAG,
+        buscado uma vez) e diferem só no contexto do alvo, no fim; o lote vai
+        para `provider.generate_batch`, que reaproveita o prefixo no servidor
+        (cache de KV do Ollama). Mensagens já em cache não são regeradas.
+        
+        Returns:
+            Uma mensagem por item de `target_profile_ids`, na mesma ordem; falhas
+            vêm como LLMProviderError no item, sem derrubar o restante do lote.
+        """
+        resolved = {
+            target_id: PersonaService._resolve_proactive(
+                persona_id, target_id, persona_override, model_override, use_rag
+            )
+            for target_id in dict.fromkeys(target_profile_ids)
+        }
+        messages = {target_id: _PROACTIVE_CACHE.get(key) for target_id, (key, _, _) in resolved.items()}
+        missing = [target_id for target_id, message in messages.items() if message is None]
+        
+        if missing:
+            if provider is None:
+                provider = get_llm_provider()
+            _, prefix, _ = resolved[missing[0]]
+            base = await PersonaService._build_proactive_prompt(prefix, "", use_rag)
+            generated = await provider.generate_batch(
+                [base + resolved[target_id][2] for target_id in missing],
+                [None] * len(missing),
+                model_override=model_override,
+            )
+            for target_id, message in zip(missing, generated):
+                if isinstance(message, BaseException):
+                    logger.error(f"Erro ao gerar mensagem proativa para {persona_id}/{target_id}: {message}")
+                    message = LLMProviderError(f"Falha na geração de mensagem: {message}")
+                else:
+                    message = message.strip()
+                    _PROACTIVE_CACHE.set(resolved[target_id][0], message)
+                messages[target_id] = message
+        
+        return [messages[target_id] for target_id in target_profile_ids]
+
+    @staticmethod
+    def _resolve_proactive(
+        persona_id: str,
+        target_profile_id: Optional[str],
+        persona_override: Optional[PersonaOverride],
+        model_override: Optional[str],
+        use_rag: bool,
+    ) -> Tuple[tuple, str, str]:
+        """Retorna a chave de cache, o prefixo e o contexto do alvo da mensagem proativa."""
+        prefix = _PROACTIVE_PREFIX_BY_ID.get(persona_id)
+        if prefix is None:
             raise ValueError(f"Persona '{persona_id}' não encontrada.")
             
         target_context = ""
         if target_profile_id:
-            target_profile = PersonaService.get_target_profile_by_id(target_profile_id)
-            if target_profile:
-                target_context = (
-                    f"\nCONTEXTO DO USUÁRIO ALVO:\n"
-                    f"Nome do Perfil: {target_profile.name}\n"
-                    f"Descrição: {target_profile.context}\n"
-                    "Adapte sua mensagem especificamente para este tipo de usuário, tentando engajá-lo da melhor forma possível dado o seu comportamento."
-                )
+            target_context = _TARGET_CONTEXT_BY_ID.get(target_profile_id, "")
         
-        provider = get_llm_provider()
+        # Aplica o override do system prompt se fornecido (único caso montado na hora)
+        override_prompt = persona_override.system_prompt if persona_override is not None else None
+        if override_prompt:
+            prefix = _proactive_prefix(override_prompt)
         
-        # Define o system prompt base
-        system_prompt = persona.system_prompt
+        key = (persona_id, target_profile_id, override_prompt, model_override, use_rag)
+        return key, prefix, target_context
+
+    @staticmethod
+    async def _generate_proactive(
+        persona_id: str,
+        prefix: str,
+        target_context: str,
+        model_override: Optional[str],
+        use_rag: bool,
+        provider: Optional[LLMProvider],
+    ) -> str:
+        """Monta o prompt proativo e chama o provider."""
+        if provider is None:
+            provider = get_llm_provider()
+        prompt = await PersonaService._build_proactive_prompt(prefix, target_context, use_rag)
         
-        # Aplica o override se fornecido
-        if persona_override:
-            if getattr(persona_override, 'system_prompt', None):
-                system_prompt = persona_override.system_prompt
-                
+        try:
+            # Reutilizamos o método generate do provider com override de modelo se houver
+            message = await provider.generate(prompt, model_override=model_override)
+            return message.strip()
+        except Exception as e:
+            logger.error(f"Erro ao gerar mensagem proativa para {persona_id}: {e}")
+            raise LLMProviderError(f"Falha na geração de mensagem: {e}")
+
+    @staticmethod
+    async def _build_proactive_prompt(prefix: str, target_context: str, use_rag: bool) -> str:
+        """Completa o prompt proativo com o contexto do RAG (se habilitado) e do alvo."""
         # Busca contexto no RAG se habilitado
         rag_context = ""
         if use_rag:
             rag_query = f"Dicas de eficiência energética, economia e conscientização sustentável."
             try:
-                retrieved_docs = get_relevant_context(rag_query, k=3)
+                # Import tardio: o RAG (langchain + chromadb) só é carregado quando usado
+                from app.rag.retriever import get_relevant_context
+                
+                retrieved_docs = await _RAG_FLIGHT.do(
+                    (rag_query, 3),
+                    lambda: run_in_threadpool(get_relevant_context, rag_query, k=3),
+                )
                 if retrieved_docs:
                     rag_context = (
                         f"\nUse as seguintes informações reais recuperadas da base de conhecimento para dar mais embasamento à sua mensagem:\n"
@@ -163,17 +352,44 @@ class PersonaService:
             except Exception as e:
                 logger.error(f"Erro ao buscar contexto RAG (ignorando): {e}")
 
-        # Cria um prompt específico para gerar a mensagem inicial
-        prompt = (
-            f"Atue com a seguinte persona:\n{system_prompt}\n{target_context}\n{rag_context}\n"
-            "Gere uma notificação curta (push notification) de 1 a 2 frases para o celular do usuário. "
-            "Seja direto e mantenha sua personalidade intrínseca."
-        )
+        # Cria um prompt específico para gerar a mensagem inicial (partes variáveis por último)
+        return prefix + rag_context + target_context
+
+    @staticmethod
+    async def generate_proactive_batch(
+        requests: List[Dict[str, Any]],
+        max_concurrency: int = settings.proactive_max_concurrency,
+    ) -> List[Any]:
+        """
+        Gera várias mensagens proativas em paralelo (ex: disparo para vários usuários).
         
-        try:
-            # Reutilizamos o método generate do provider com override de modelo se houver
-            message = await provider.generate(prompt, model_override=model_override)
-            return message
-        except Exception as e:
-            logger.error(f"Erro ao gerar mensagem proativa para {persona_id}: {e}")
-            raise LLMProviderError(f"Falha na geração de mensagem: {e}")
+        Cada item de `requests` traz os argumentos de `generate_proactive_message`.
+        As chamadas ao LLM se sobrepõem, limitadas a `max_concurrency` simultâneas.
+        O resultado segue a ordem de `requests`; falhas vêm como a exceção do item,
+        sem interromper os demais.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def one(request: Dict[str, Any]) -> str:
+            async with semaphore:
+                return await PersonaService.generate_proactive_message(**request)
+
+        return await asyncio.gather(*(one(r) for r in requests), return_exceptions=True)
+
+
+async def warmup_proactive_messages() -> None:
+    """
+    Gera uma mensagem proativa por persona (sem RAG) em background no startup.
+    
+    Popula o cache de prefixo/KV do provider com o cabeçalho fixo de cada
+    persona e o cache local de mensagens, para que a primeira notificação
+    real não pague o prefill a frio. Falhas são apenas logadas.
+    """
+    results = await PersonaService.generate_proactive_batch(
+        [{"persona_id": p.id, "use_rag": False} for p in PERSONAS]
+    )
+    failures = sum(isinstance(r, BaseException) for r in results)
+    if failures:
+        logger.debug(f"Warmup das personas: {failures} de {len(results)} falharam")
+    else:
+        logger.info(f"Warmup das personas concluído ({len(results)} mensagens)")
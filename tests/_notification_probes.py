@@ -0,0 +1,75 @@
+"""
+Verificações manuais compartilhadas pelos scripts verify_*.py.
+
+Requer o servidor rodando em BASE_URL. Cada probe recebe o mesmo
+httpx.AsyncClient (keep-alive) e encerra o script em caso de falha.
+"""
+
+import sys
+
+import httpx
+
+BASE_URL = "http://localhost:8001"
+
+def make_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(base_url=BASE_URL, timeout=60)
+
+async def probe_notifications_page(client):
+    print(f"Testing GET {BASE_URL}/notifications...")
+    try:
+        response = await client.get("/notifications")
+        if response.status_code == 200:
+            print("✅ Notifications page loaded successfully.")
+        else:
+            print(f"❌ Failed to load notifications page. Status: {response.status_code}")
+            sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error connecting to server: {e}")
+        sys.exit(1)
+
+async def _probe_list(client, path, label):
+    print(f"Testing GET {BASE_URL}{path}...")
+    try:
+        response = await client.get(path)
+        if response.status_code == 200:
+            items = response.json()
+            if len(items) > 0:
+                print(f"✅ Retrieved {len(items)} {label}.")
+                return items[0]['id']
+            else:
+                print(f"❌ No {label} returned.")
+                sys.exit(1)
+        else:
+            print(f"❌ Failed to list {label}. Status: {response.status_code}")
+            sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error listing {label}: {e}")
+        sys.exit(1)
+
+async def probe_list_personas(client):
+    return await _probe_list(client, "/personas", "personas")
+
+async def probe_list_target_profiles(client):
+    return await _probe_list(client, "/target-profiles", "target profiles")
+
+async def probe_proactive_chat(client, persona_id, target_profile_id):
+    print(f"Testing POST {BASE_URL}/chat/proactive with persona='{persona_id}' and target='{target_profile_id}'...")
+    payload = {
+        "persona_id": persona_id,
+        "target_profile_id": target_profile_id,
+        "model_override": "gemini-3-flash-preview"
+    }
+    
+    try:
+        response = await client.post("/chat/proactive", json=payload)
+        
+        if response.status_code == 200:
+            data = response.json()
+            print("✅ Proactive chat response received.")
+            print(f"   Model: {data['model']}")
+            print(f"   Reply: {data['reply']}")
+        else:
+            print(f"⚠️ Proactive chat request returned {response.status_code}. Response: {response.text}")
+
+    except Exception as e:
+        print(f"❌ Error in proactive chat: {e}")
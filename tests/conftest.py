@@ -3,61 +3,94 @@ Configurações e fixtures para testes pytest.
 
 Os mocks são aplicados no módulo onde as funções são USADAS (app.api.routes),
 não onde são definidas, seguindo a regra do Python para monkeypatching.
+
+A aplicação (app.main / app.api.routes) só é importada pelas fixtures que a
+usam: rodar apenas testes de outros módulos não paga o import do FastAPI.
 """
 
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from fastapi.testclient import TestClient
-
-# Import the modules where we need to patch
-from app import api
-from app.api import routes
-from app.main import app
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    """Cliente de teste para a API FastAPI."""
+    """Cliente de teste para a API FastAPI (um só para toda a sessão)."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    
     return TestClient(app)
 
 
-@pytest.fixture
+def _configure_provider(provider):
+    """(Re)define as respostas fixas do provider falso."""
+    provider.name = "ollama"
+    provider.model = "test-model"
+    provider.generate = AsyncMock(return_value="Esta é uma resposta de teste do chatbot.")
+    provider.is_available = AsyncMock(return_value=True)
+    
+    async def generate_stream(prompt, history=None, model_override=None):
+        for chunk in ("Esta é uma resposta ", "de teste do chatbot."):
+            yield chunk
+    
+    provider.generate_stream = MagicMock(side_effect=generate_stream)
+
+
+class _FakeMemory:
+    """
+    Gerenciador de memória falso com histórico em dict simples.
+    
+    Os métodos são funções Python comuns; os MagicMock com `wraps` só
+    registram as chamadas para os asserts de call_count/call_args_list.
+    """
+    
+    blocking_io = False
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Esvazia o histórico e zera as chamadas registradas."""
+        self._history = {}
+        self.add_message = MagicMock(wraps=self._add_message)
+        self.get_formatted_history = MagicMock(wraps=self._get_formatted_history)
+        self.flush = MagicMock()
+    
+    def _add_message(self, session_id, role, content):
+        self._history.setdefault(session_id, []).append({"role": role, "content": content})
+    
+    def _get_formatted_history(self, session_id):
+        return self._history.get(session_id, [])
+
+
+@pytest.fixture(scope="session")
 def mock_llm_provider():
     """
     Mock do provider LLM para testes.
     
-    Retorna respostas fixas sem chamar LLM real.
+    Retorna respostas fixas sem chamar LLM real. Criado uma vez por sessão;
+    `_reset_mocks` restaura as respostas e zera as chamadas a cada teste.
     """
     provider = MagicMock()
-    provider.name = "ollama"
-    provider.model = "test-model"
-    provider.generate = AsyncMock(return_value="Esta é uma resposta de teste do chatbot.")
-    provider.is_available = AsyncMock(return_value=True)
+    _configure_provider(provider)
     return provider
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_memory_manager():
     """
     Mock do gerenciador de memória para testes.
     
-    Mantém histórico em dict simples.
+    Mantém histórico em dict simples (esvaziado a cada teste).
     """
-    manager = MagicMock()
-    manager._history = {}
-    
-    def add_message(session_id, role, content):
-        if session_id not in manager._history:
-            manager._history[session_id] = []
-        manager._history[session_id].append({"role": role, "content": content})
-    
-    def get_formatted_history(session_id):
-        return manager._history.get(session_id, [])
-    
-    manager.add_message = MagicMock(side_effect=add_message)
-    manager.get_formatted_history = MagicMock(side_effect=get_formatted_history)
-    
-    return manager
+    return _FakeMemory()
+
+
+@pytest.fixture(autouse=True)
+def _reset_mocks(mock_llm_provider, mock_memory_manager):
+    """Cada teste recebe os mocks de sessão no estado inicial."""
+    _configure_provider(mock_llm_provider)
+    mock_memory_manager.reset()
+    yield
 
 
 @pytest.fixture
@@ -68,6 +101,8 @@ def patched_services(mock_llm_provider, mock_memory_manager, monkeypatch):
     IMPORTANTE: Patches são aplicados no módulo routes onde as funções são chamadas,
     não nos módulos onde são definidas.
     """
+    from app.api import routes
+    
     # Patch at the location where the functions are CALLED (app.api.routes)
     monkeypatch.setattr(routes, "get_llm_provider", lambda: mock_llm_provider)
     monkeypatch.setattr(routes, "get_memory_manager", lambda: mock_memory_manager)
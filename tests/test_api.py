@@ -5,8 +5,11 @@ Testa:
 - GET /health
 - POST /chat (com mock do provider)
 - Manutenção de sessão
+- POST /chat/proactive/stream (SSE)
 """
 
+import json
+
 import pytest
 
 
@@ -45,6 +48,7 @@ class TestHealthEndpoint:
         assert data["provider_available"] is False
 
 
+
 class TestChatEndpoint:
     """Testes para o endpoint /chat."""
     
@@ -115,6 +119,70 @@ class TestChatEndpoint:
         # Verifica que generate foi chamado
         provider.generate.assert_called_once()
     
+    def test_chat_repeated_message_uses_cache(self, client, patched_services):
+        """
+        /chat deve reaproveitar a resposta para a mesma mensagem no mesmo ponto da conversa.
+        """
+        payload = {"session_id": "test-cache-001", "message": "Pergunta repetida"}
+        memory = patched_services["memory"]
+        
+        first = client.post("/chat", json=payload)
+        # Volta a conversa ao mesmo ponto (ex: retry antes do histórico ser salvo)
+        memory._history.clear()
+        second = client.post("/chat", json=payload)
+        
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        patched_services["provider"].generate.assert_called_once()
+    
+    def test_chat_cache_hit_is_saved_to_history(self, client, patched_services):
+        """
+        Uma resposta servida do cache também deve entrar no histórico da sessão.
+        """
+        payload = {"session_id": "test-cache-002", "message": "Pergunta repetida"}
+        memory = patched_services["memory"]
+        
+        client.post("/chat", json=payload)
+        memory._history.clear()
+        client.post("/chat", json=payload)
+        
+        patched_services["provider"].generate.assert_called_once()
+        assert memory._history["test-cache-002"] == [
+            {"role": "user", "content": "Pergunta repetida"},
+            {"role": "assistant", "content": "Esta é uma resposta de teste do chatbot."},
+        ]
+    
+    def test_chat_cache_depends_on_history(self, client, patched_services):
+        """
+        A mesma mensagem em outro ponto da conversa não deve reaproveitar a resposta.
+        """
+        payload = {"session_id": "test-cache-003", "message": "sim"}
+        
+        client.post("/chat", json=payload)
+        client.post("/chat", json=payload)
+        
+        assert patched_services["provider"].generate.call_count == 2
+    
+    def test_chat_read_your_writes_saves_before_responding(
+        self, client, patched_services, monkeypatch
+    ):
+        """
+        Com MEMORY_READ_YOUR_WRITES (vários workers), /chat deve gravar e aguardar
+        o flush da sessão antes de responder, e não em background.
+        """
+        from app.api import routes
+        monkeypatch.setattr(routes, "_READ_YOUR_WRITES", True)
+        memory = patched_services["memory"]
+        
+        response = client.post(
+            "/chat",
+            json={"session_id": "test-ryw-001", "message": "Mensagem"},
+        )
+        
+        assert response.status_code == 200
+        memory.flush.assert_called_once_with("test-ryw-001")
+        assert memory._history["test-ryw-001"][-1]["role"] == "assistant"
+    
     def test_chat_validates_empty_session_id(self, client, patched_services):
         """
         /chat deve rejeitar session_id vazio.
@@ -144,18 +212,194 @@ class TestChatEndpoint:
         assert response.status_code == 422  # Validation error
 
 
+class TestChatStreamEndpoint:
+    """Testes para o endpoint /chat/stream."""
+    
+    @staticmethod
+    def parse_events(body: str) -> list[tuple[str, object]]:
+        """Converte o corpo SSE em uma lista de (evento, dados)."""
+        events = []
+        for block in body.strip().split("\n\n"):
+            event = "message"
+            data = None
+            for line in block.splitlines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+            events.append((event, data))
+        return events
+    
+    def test_chat_stream_sends_chunks_and_done(self, client, patched_services):
+        """
+        /chat/stream deve enviar os pedaços da resposta e um evento final `done`.
+        """
+        response = client.post(
+            "/chat/stream",
+            json={"session_id": "test-stream-001", "message": "Olá"},
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        
+        events = self.parse_events(response.text)
+        chunks = [data for event, data in events if event == "message"]
+        assert "".join(chunks) == "Esta é uma resposta de teste do chatbot."
+        
+        event, done = events[-1]
+        assert event == "done"
+        assert done["reply"] == "Esta é uma resposta de teste do chatbot."
+        assert done["session_id"] == "test-stream-001"
+    
+    def test_chat_stream_saves_messages_after_completion(self, client, patched_services):
+        """
+        /chat/stream deve salvar mensagem e resposta completa no histórico.
+        """
+        client.post(
+            "/chat/stream",
+            json={"session_id": "test-stream-002", "message": "Mensagem"},
+        )
+        
+        memory = patched_services["memory"]
+        assert memory._history["test-stream-002"] == [
+            {"role": "user", "content": "Mensagem"},
+            {"role": "assistant", "content": "Esta é uma resposta de teste do chatbot."},
+        ]
+    
+    def test_chat_stream_history_error_returns_error_response(self, client, patched_services):
+        """
+        Falha ao carregar o histórico deve virar um 500 no formato de erro do /chat.
+        """
+        patched_services["memory"].get_formatted_history.side_effect = RuntimeError("db travado")
+        
+        response = client.post(
+            "/chat/stream",
+            json={"session_id": "test-stream-003", "message": "Mensagem"},
+        )
+        
+        assert response.status_code == 500
+        assert response.json()["detail"]["error"] == "internal_error"
+    
+    def test_chat_stream_save_error_sends_error_event(self, client, patched_services):
+        """
+        Falha ao salvar o histórico deve terminar o stream com um evento `error`.
+        """
+        patched_services["memory"].add_message.side_effect = RuntimeError("db travado")
+        
+        response = client.post(
+            "/chat/stream",
+            json={"session_id": "test-stream-004", "message": "Mensagem"},
+        )
+        
+        event, payload = self.parse_events(response.text)[-1]
+        assert event == "error"
+        assert payload["error"] == "internal_error"
+
+
+class TestPersonasEndpoint:
+    """Testes para os endpoints /personas e /target-profiles."""
+    
+    def test_list_personas(self, client):
+        """
+        /personas deve listar todas as personas com id, nome e descrição.
+        """
+        response = client.get("/personas")
+        
+        assert response.status_code == 200
+        ids = [p["id"] for p in response.json()]
+        assert ids == ["provocador", "motivador", "debochado"]
+    
+    def test_list_target_profiles(self, client):
+        """
+        /target-profiles deve listar os perfis de usuário alvo.
+        """
+        response = client.get("/target-profiles")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [p["id"] for p in data] == ["gastao", "indiferente", "engajado"]
+        assert set(data[0]) == {"id", "name", "description"}
+
+
+class TestChatProactiveStreamEndpoint:
+    """Testes para o endpoint /chat/proactive/stream."""
+    
+    def test_proactive_stream_sends_chunks_and_done(self, client, patched_services):
+        """
+        /chat/proactive/stream deve transmitir a mensagem e terminar com `done`.
+        """
+        from app.services.persona_service import clear_proactive_cache
+        clear_proactive_cache()
+        
+        response = client.post(
+            "/chat/proactive/stream",
+            json={"persona_id": "motivador", "target_profile_id": "engajado", "use_rag": False},
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        
+        events = TestChatStreamEndpoint.parse_events(response.text)
+        chunks = [data for event, data in events if event == "message"]
+        assert chunks == ["Esta é uma resposta ", "de teste do chatbot."]
+        
+        event, done = events[-1]
+        assert event == "done"
+        assert done["reply"] == "Esta é uma resposta de teste do chatbot."
+        clear_proactive_cache()
+    
+    def test_proactive_stream_unknown_persona(self, client, patched_services):
+        """
+        /chat/proactive/stream deve responder 404 antes de abrir o stream.
+        """
+        response = client.post(
+            "/chat/proactive/stream",
+            json={"persona_id": "inexistente", "use_rag": False},
+        )
+        
+        assert response.status_code == 404
+
+
 class TestRootEndpoint:
     """Testes para o endpoint raiz /."""
     
-    def test_root_returns_welcome_message(self, client):
+    def test_root_serves_chat_interface(self, client):
         """
-        / deve retornar mensagem de boas-vindas com links úteis.
+        / deve servir a interface de testes (index.html), não mais um JSON de boas-vindas.
         """
         response = client.get("/")
         
         assert response.status_code == 200
-        data = response.json()
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.text.lstrip().lower().startswith("<!doctype html")
+    
+    def test_root_serves_index_with_cache_headers(self, client):
+        """
+        / deve servir a interface estática com Cache-Control e ETag.
+        """
+        response = client.get("/")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.headers["cache-control"].startswith("public, max-age=")
+        assert "etag" in response.headers
+
+
+class TestTraceId:
+    """Testes para o trace id por requisição."""
+    
+    def test_response_carries_generated_trace_id(self, client, patched_services):
+        """
+        Toda resposta deve trazer um X-Request-ID gerado pelo servidor.
+        """
+        response = client.get("/health")
+        
+        assert len(response.headers["x-request-id"]) == 32
+    
+    def test_incoming_trace_id_is_reused(self, client, patched_services):
+        """
+        X-Request-ID enviado pelo cliente deve ser devolvido sem alteração.
+        """
+        response = client.get("/health", headers={"X-Request-ID": "abc-123"})
         
-        assert "message" in data
-        assert "docs" in data
-        assert data["docs"] == "/docs"
+        assert response.headers["x-request-id"] == "abc-123"
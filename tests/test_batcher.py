@@ -0,0 +1,91 @@
+"""
+Testes para o micro-batching do /chat.
+
+Testa:
+- Agrupamento de requisições concorrentes em um único lote
+- Separação de lotes por modelo
+- Propagação de erros individuais
+"""
+
+import asyncio
+
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.batcher import ChatBatcher
+
+
+def make_provider():
+    """Provider falso que ecoa o prompt recebido."""
+    provider = MagicMock()
+    provider.generate = AsyncMock(side_effect=lambda prompt, history, model_override=None: f"eco: {prompt}")
+
+    async def generate_batch(prompts, histories, model_override=None):
+        return [f"lote: {p}" for p in prompts]
+
+    provider.generate_batch = AsyncMock(side_effect=generate_batch)
+    return provider
+
+
+class TestChatBatcher:
+    """Testes para o ChatBatcher."""
+
+    async def test_single_request_calls_generate(self):
+        """
+        Uma requisição isolada deve ir direto para generate.
+        """
+        provider = make_provider()
+        batcher = ChatBatcher(max_batch_size=8, max_wait_ms=5)
+
+        reply = await batcher.submit(provider, "oi")
+
+        assert reply == "eco: oi"
+        provider.generate.assert_called_once()
+        provider.generate_batch.assert_not_called()
+
+    async def test_concurrent_requests_share_one_batch(self):
+        """
+        Requisições dentro da mesma janela devem virar um único generate_batch.
+        """
+        provider = make_provider()
+        batcher = ChatBatcher(max_batch_size=8, max_wait_ms=20)
+
+        replies = await asyncio.gather(
+            batcher.submit(provider, "a"),
+            batcher.submit(provider, "b"),
+            batcher.submit(provider, "c"),
+        )
+
+        assert replies == ["lote: a", "lote: b", "lote: c"]
+        provider.generate_batch.assert_called_once()
+
+    async def test_batches_are_split_by_model(self):
+        """
+        Modelos diferentes não podem compartilhar o mesmo lote.
+        """
+        provider = make_provider()
+        batcher = ChatBatcher(max_batch_size=8, max_wait_ms=20)
+
+        await asyncio.gather(
+            batcher.submit(provider, "a", model_override="m1"),
+            batcher.submit(provider, "b", model_override="m2"),
+        )
+
+        assert provider.generate.call_count == 2
+        provider.generate_batch.assert_not_called()
+
+    async def test_individual_errors_are_propagated(self):
+        """
+        Erro de um item do lote deve chegar apenas ao chamador correspondente.
+        """
+        provider = make_provider()
+        provider.generate_batch = AsyncMock(return_value=["ok", ValueError("falhou")])
+        batcher = ChatBatcher(max_batch_size=2, max_wait_ms=50)
+
+        results = await asyncio.gather(
+            batcher.submit(provider, "a"),
+            batcher.submit(provider, "b"),
+            return_exceptions=True,
+        )
+
+        assert results[0] == "ok"
+        assert isinstance(results[1], ValueError)
@@ -0,0 +1,58 @@
+"""
+Testes para o cache TTL/LRU em memória.
+"""
+
+import time
+
+from app.core.cache import TTLCache
+
+
+class TestTTLCache:
+    """Testes para o TTLCache."""
+
+    def test_get_returns_stored_value(self):
+        """
+        Valor armazenado deve ser retornado e contado como acerto.
+        """
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_evicts_least_recently_used(self):
+        """
+        Ao estourar o tamanho, a entrada menos usada deve sair.
+        """
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_expired_entries_are_dropped(self):
+        """
+        Entradas com TTL vencido não devem ser retornadas.
+        """
+        cache = TTLCache(maxsize=2, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_zero_ttl_disables_cache(self):
+        """
+        TTL zero desativa o armazenamento.
+        """
+        cache = TTLCache(maxsize=10, ttl=0)
+        cache.set("a", 1)
+
+        assert not cache.enabled
+        assert cache.get("a") is None
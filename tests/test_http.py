@@ -0,0 +1,38 @@
+"""
+Testes para o cliente HTTP compartilhado.
+"""
+
+import asyncio
+
+from app.services.http import close_shared_async_client, get_shared_async_client
+
+
+class TestHttpClient:
+    """Testes para o cliente HTTP compartilhado."""
+
+    def test_one_client_per_event_loop(self):
+        """
+        Cada event loop deve ter seu próprio cliente, reaproveitado dentro do loop.
+        """
+        async def get_twice():
+            first, second = get_shared_async_client(), get_shared_async_client()
+            await close_shared_async_client()
+            return first, second
+
+        first_a, second_a = asyncio.run(get_twice())
+        first_b, _ = asyncio.run(get_twice())
+
+        assert first_a is second_a
+        assert first_a is not first_b
+        assert first_a.is_closed
+
+    def test_requests_compressed_responses(self):
+        """
+        O cliente compartilhado deve pedir respostas comprimidas.
+        """
+        async def headers():
+            client = get_shared_async_client()
+            await close_shared_async_client()
+            return client.headers
+
+        assert "gzip" in asyncio.run(headers())["accept-encoding"]
@@ -0,0 +1,37 @@
+"""
+Testes para a ingestão de PDFs no RAG.
+
+Testa:
+- Rate limiting do TokenBucket, inclusive para batches maiores que a cota
+"""
+
+import time
+
+from app.rag.ingest import TokenBucket
+
+
+class TestTokenBucket:
+    """Testes para o TokenBucket."""
+
+    async def test_within_capacity_does_not_wait(self):
+        """
+        Pedidos dentro da cota inicial devem passar sem esperar.
+        """
+        bucket = TokenBucket(rate=10, period=1.0)
+
+        start = time.monotonic()
+        await bucket.acquire(10)
+
+        assert time.monotonic() - start < 0.05
+
+    async def test_oversized_batch_waits_for_full_amount(self):
+        """
+        Um batch maior que a capacidade deve esperar pelos tokens excedentes.
+        """
+        bucket = TokenBucket(rate=10, period=0.2)
+
+        start = time.monotonic()
+        await bucket.acquire(25)
+
+        # 10 tokens imediatos + 15 repostos a 50/s = ~0.3s
+        assert time.monotonic() - start >= 0.28
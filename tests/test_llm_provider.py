@@ -0,0 +1,283 @@
+"""
+Testes para os providers LLM.
+
+Usa httpx.MockTransport no lugar do servidor real.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services import llm_provider
+from app.services.llm_provider import (
+    HuggingFaceProvider,
+    LLMProviderError,
+    ModelNotFoundError,
+    OllamaProvider,
+    ProviderNotAvailableError,
+    probe_all_providers,
+)
+
+
+def ndjson(*chunks: str) -> bytes:
+    """Resposta em streaming do /api/chat do Ollama."""
+    lines = [json.dumps({"message": {"content": c}, "done": False}) for c in chunks]
+    lines.append(json.dumps({"done": True}))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def make_ollama(handler) -> OllamaProvider:
+    return OllamaProvider(
+        base_url="http://ollama.test",
+        model_name="test-model",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+class TestOllamaProvider:
+    """Testes para o OllamaProvider."""
+
+    async def test_generate_joins_streamed_chunks(self):
+        """
+        generate deve pedir streaming e juntar os pedaços recebidos.
+        """
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(json.loads(request.content))
+            return httpx.Response(200, content=ndjson(" Olá", ", mundo "))
+
+        reply = await make_ollama(handler).generate("oi")
+
+        assert reply == "Olá, mundo"
+        assert requests[0]["stream"] is True
+        assert requests[0]["keep_alive"] == settings.ollama_keep_alive
+
+    async def test_warmup_loads_model(self):
+        """
+        warmup deve pedir ao Ollama para carregar o modelo (sem prompt).
+        """
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"done": True})
+
+        await make_ollama(handler).warmup()
+
+        assert requests[0].url.path == "/api/generate"
+        assert json.loads(requests[0].content) == {
+            "model": "test-model",
+            "keep_alive": settings.ollama_keep_alive,
+        }
+
+    async def test_generate_raises_model_not_found(self):
+        """
+        404 do Ollama deve virar ModelNotFoundError.
+        """
+        provider = make_ollama(lambda request: httpx.Response(404))
+
+        with pytest.raises(ModelNotFoundError):
+            await provider.generate("oi")
+
+    async def test_concurrent_identical_generations_are_coalesced(self):
+        """
+        Gerações idênticas simultâneas devem virar uma única chamada ao Ollama.
+        """
+        requests = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, content=ndjson("Olá"))
+
+        provider = make_ollama(handler)
+
+        replies = await asyncio.gather(
+            provider.generate("oi"), provider.generate("oi"), provider.generate("tchau")
+        )
+
+        assert replies == ["Olá", "Olá", "Olá"]
+        assert len(requests) == 2
+
+    async def test_stream_raises_on_error_line(self):
+        """
+        Uma linha {"error": ...} no meio do stream deve virar LLMProviderError.
+        """
+        body = (json.dumps({"message": {"content": "Olá"}, "done": False}) + "\n"
+                + json.dumps({"error": "out of memory"}) + "\n").encode()
+        provider = make_ollama(lambda request: httpx.Response(200, content=body))
+
+        chunks = []
+        with pytest.raises(LLMProviderError, match="out of memory"):
+            async for chunk in provider.generate_stream("oi"):
+                chunks.append(chunk)
+
+        assert chunks == ["Olá"]
+
+
+class TestHuggingFaceProvider:
+    """Testes para o HuggingFaceProvider."""
+
+    def test_prompt_keeps_most_recent_history_within_budget(self, monkeypatch):
+        """
+        O histórico deve entrar do mais recente ao mais antigo até o limite de caracteres.
+        """
+        monkeypatch.setattr(settings, "hf_history_char_budget", 40)
+        monkeypatch.setattr(settings, "bot_system_prompt", "")
+        provider = HuggingFaceProvider(token="hf_test")
+        history = [
+            {"role": "user", "content": "x" * 100},
+            {"role": "assistant", "content": "antiga"},
+            {"role": "user", "content": "recente"},
+        ]
+
+        prompt = provider._build_prompt("oi", history)
+
+        assert prompt == (
+            "[Assistente]: antiga\n"
+            "[Usuário]: recente\n"
+            "[Usuário]: oi\n[Assistente]:"
+        )
+
+    async def test_generate_sends_prompt_and_default_parameters(self):
+        """
+        generate deve enviar o prompt e os parâmetros padrão como JSON.
+        """
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json=[{"generated_text": " Olá! "}])
+
+        provider = HuggingFaceProvider(token="hf_test")
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        reply = await provider.generate("oi")
+
+        body = json.loads(requests[0].content)
+        assert reply == "Olá!"
+        assert requests[0].headers["content-type"] == "application/json"
+        assert requests[0].headers["authorization"] == "Bearer hf_test"
+        assert body["parameters"] == {
+            **HuggingFaceProvider.DEFAULT_PARAMETERS,
+            "temperature": settings.hf_temperature,
+            "do_sample": True,
+        }
+        assert body["inputs"].endswith("[Usuário]: oi\n[Assistente]:")
+
+
+class TestGenerationCache:
+    """Testes para o cache de gerações do LLMProvider."""
+
+    @pytest.mark.parametrize("temperature, expected_requests", [(0.0, 1), (0.7, 2)])
+    async def test_caches_only_low_temperature(self, monkeypatch, temperature, expected_requests):
+        """
+        Gerações repetidas só devem ser reaproveitadas com temperatura baixa.
+        """
+        monkeypatch.setattr(llm_provider, "_GENERATION_CACHE", TTLCache(maxsize=16, ttl=60))
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json=[{"generated_text": "Olá!"}])
+
+        provider = HuggingFaceProvider(token="hf_test", temperature=temperature)
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        assert await provider.generate("oi") == "Olá!"
+        assert await provider.generate("oi") == "Olá!"
+        assert len(requests) == expected_requests
+
+
+class TestAvailabilityCache:
+    """Testes para o cache de disponibilidade do LLMProvider."""
+
+    async def test_recent_result_is_reused(self):
+        """
+        is_available seguidos devem consultar o servidor uma única vez.
+        """
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"models": [{"name": "test-model:latest"}]})
+
+        provider = make_ollama(handler)
+
+        assert await provider.is_available() is True
+        assert await provider.is_available() is True
+        assert len(requests) == 1
+
+    async def test_concurrent_probes_are_coalesced(self):
+        """
+        Chamadas concorrentes devem compartilhar um único probe.
+        """
+        requests = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"models": [{"name": "test-model"}]})
+
+        provider = make_ollama(handler)
+
+        results = await asyncio.gather(*(provider.is_available() for _ in range(5)))
+
+        assert results == [True] * 5
+        assert len(requests) == 1
+
+    async def test_generation_failure_invalidates_cache(self):
+        """
+        Um ProviderNotAvailableError na geração deve descartar o resultado cacheado.
+        """
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/chat":
+                raise httpx.ConnectError("connection refused", request=request)
+            return httpx.Response(200, json={"models": [{"name": "test-model"}]})
+
+        provider = make_ollama(handler)
+        assert await provider.is_available() is True
+
+        with pytest.raises(ProviderNotAvailableError):
+            await provider.generate("oi")
+
+        assert provider._availability is None
+
+
+class TestProbeAllProviders:
+    """Testes para o probe paralelo dos providers configurados."""
+
+    async def test_probes_run_concurrently(self, monkeypatch):
+        """
+        Todos os providers configurados devem ser verificados ao mesmo tempo.
+        """
+        monkeypatch.setattr(settings, "hf_token", "hf_test")
+        monkeypatch.setattr(settings, "gemini_api_key", None)
+        monkeypatch.setattr(
+            llm_provider, "_probe_instances", {"huggingface": HuggingFaceProvider(token="hf_test")}
+        )
+
+        active = OllamaProvider()
+        monkeypatch.setattr(llm_provider, "get_llm_provider", lambda: active)
+
+        running = []
+
+        async def check_ollama():
+            running.append("ollama")
+            await asyncio.sleep(0.01)
+            return len(running) == 2
+
+        async def check_hf():
+            running.append("huggingface")
+            await asyncio.sleep(0.01)
+            raise httpx.ConnectError("connection refused")
+
+        monkeypatch.setattr(active, "_check_available", check_ollama)
+        monkeypatch.setattr(HuggingFaceProvider, "_check_available", lambda self: check_hf())
+
+        assert await probe_all_providers() == {"ollama": True, "huggingface": False}
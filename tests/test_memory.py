@@ -0,0 +1,136 @@
+"""
+Testes para os gerenciadores de memória.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.memory import InMemoryManager, SQLiteMemoryManager
+
+
+class TestSQLiteMemoryManager:
+    """Testes para o SQLiteMemoryManager."""
+
+    def test_history_keeps_last_messages(self, tmp_path):
+        """
+        O histórico deve trazer só as últimas max_messages, em ordem cronológica.
+        """
+        memory = SQLiteMemoryManager(db_path=str(tmp_path / "chat.db"), max_messages=4)
+        for i in range(7):
+            memory.add_message("s1", "user", f"m{i}")
+
+        history = memory.get_history("s1")
+        memory.close()
+
+        assert [msg["content"] for msg in history] == ["m3", "m4", "m5", "m6"]
+        assert all(msg["timestamp"] for msg in history)
+
+    def test_trigger_prunes_only_the_same_session(self, tmp_path):
+        """
+        Cada INSERT deve podar o excesso da própria sessão, sem tocar nas demais.
+        """
+        memory = SQLiteMemoryManager(db_path=str(tmp_path / "chat.db"), max_messages=4)
+        memory.add_message("s2", "user", "outra sessão")
+        for i in range(5):
+            memory.add_message("s1", "user", f"m{i}")
+
+        memory.flush()
+        counts = dict(memory._conn.execute(
+            "SELECT session_id, COUNT(*) FROM messages GROUP BY session_id"
+        ).fetchall())
+        memory.close()
+
+        assert counts == {"s1": 4, "s2": 1}
+
+    def test_writes_are_batched_and_visible_to_reads(self, tmp_path):
+        """
+        Mensagens enfileiradas devem ser gravadas em lote e aparecer na leitura seguinte.
+        """
+        memory = SQLiteMemoryManager(db_path=str(tmp_path / "chat.db"), max_messages=4)
+        transactions = []
+        write_batch = memory._write_batch
+        memory._write_batch = lambda batch: (transactions.append(len(batch)), write_batch(batch))
+
+        memory.add_message("s1", "user", "oi")
+        memory.add_message("s1", "assistant", "olá")
+
+        assert [msg["content"] for msg in memory.get_history("s1")] == ["oi", "olá"]
+        assert sum(transactions) == 2
+        memory.close()
+
+    def test_flush_session_makes_writes_visible_to_other_managers(self, tmp_path):
+        """
+        Após flush(session_id), outro manager no mesmo arquivo (outro worker)
+        deve enxergar as mensagens da sessão.
+        """
+        db_path = str(tmp_path / "chat.db")
+        writer = SQLiteMemoryManager(db_path=db_path, max_messages=4)
+        reader = SQLiteMemoryManager(db_path=db_path, max_messages=4)
+
+        writer.add_message("s1", "user", "oi")
+        writer.add_message("s1", "assistant", "olá")
+        writer.flush("s1")
+
+        history = reader.get_history("s1")
+        writer.close()
+        reader.close()
+
+        assert [msg["content"] for msg in history] == ["oi", "olá"]
+
+    def test_each_thread_reads_with_its_own_connection(self, tmp_path):
+        """
+        Cada thread deve ter sua conexão de leitura, reaproveitada entre leituras.
+        """
+        memory = SQLiteMemoryManager(db_path=str(tmp_path / "chat.db"))
+        memory.add_message("s1", "user", "oi")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            conns = list(executor.map(lambda _: memory._reader(), range(2)))
+        main_conn = memory._reader()
+
+        assert main_conn is memory._reader()
+        assert main_conn not in conns
+        assert memory.get_history("s1")[0]["content"] == "oi"
+        memory.close()
+
+
+    def test_formatted_history_has_only_role_and_content(self, tmp_path):
+        """
+        O histórico para o provider deve trazer só role e content, em ordem cronológica.
+        """
+        memory = SQLiteMemoryManager(db_path=str(tmp_path / "chat.db"), max_messages=2)
+        for role, content in [("user", "a"), ("assistant", "b"), ("user", "c")]:
+            memory.add_message("s1", role, content)
+
+        history = memory.get_formatted_history("s1")
+        memory.close()
+
+        assert history == [{"role": "assistant", "content": "b"}, {"role": "user", "content": "c"}]
+
+
+class TestInMemoryManager:
+    """Testes para o InMemoryManager."""
+
+    def test_least_recently_used_session_is_evicted(self):
+        """
+        Acima de max_sessions, a sessão usada há mais tempo deve ser descartada.
+        """
+        memory = InMemoryManager(max_messages=4, max_sessions=2)
+        memory.add_message("s1", "user", "a")
+        memory.add_message("s2", "user", "b")
+        memory.get_history("s1")  # s1 passa a ser a mais recente
+        memory.add_message("s3", "user", "c")
+
+        assert memory.get_history("s1")[0]["content"] == "a"
+        assert memory.get_history("s2") == []
+        assert memory.get_history("s3")[0]["content"] == "c"
+
+    def test_history_keeps_last_messages(self):
+        """
+        Cada sessão deve manter só as últimas max_messages, e limit deve cortar do fim.
+        """
+        memory = InMemoryManager(max_messages=3)
+        for i in range(5):
+            memory.add_message("s1", "user", f"m{i}")
+
+        assert [msg["content"] for msg in memory.get_history("s1")] == ["m2", "m3", "m4"]
+        assert [msg["content"] for msg in memory.get_history("s1", limit=2)] == ["m3", "m4"]
@@ -0,0 +1,274 @@
+"""
+Testes para o serviço de personas.
+
+Testa:
+- Geração de mensagens proativas em lote com concorrência limitada
+- Cache e coalescência de mensagens proativas repetidas
+- Warmup das personas
+- Lote de mensagens de uma persona para vários perfis alvo
+"""
+
+import asyncio
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services import persona_service
+from app.services.llm_provider import LLMProviderError
+from app.services.persona_service import (
+    PERSONAS,
+    PersonaService,
+    clear_proactive_cache,
+    warmup_proactive_messages,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_proactive_cache():
+    """Cada teste começa com o cache de mensagens proativas vazio."""
+    clear_proactive_cache()
+    yield
+    clear_proactive_cache()
+
+
+@pytest.fixture
+def slow_provider(monkeypatch):
+    """Provider falso que registra o pico de gerações simultâneas."""
+    provider = MagicMock()
+    provider.running = 0
+    provider.peak = 0
+    provider.calls = 0
+
+    async def generate(prompt, model_override=None):
+        provider.calls += 1
+        provider.running += 1
+        provider.peak = max(provider.peak, provider.running)
+        await asyncio.sleep(0.01)
+        provider.running -= 1
+        return "notificação"
+
+    provider.generate = generate
+    monkeypatch.setattr(persona_service, "get_llm_provider", lambda: provider)
+    return provider
+
+
+class TestGenerateProactiveBatch:
+    """Testes para PersonaService.generate_proactive_batch."""
+
+    async def test_limits_concurrency(self, slow_provider):
+        """
+        Não deve passar de max_concurrency gerações ao mesmo tempo.
+        """
+        requests = [
+            {"persona_id": "motivador", "model_override": f"modelo-{i}", "use_rag": False}
+            for i in range(6)
+        ]
+
+        results = await PersonaService.generate_proactive_batch(requests, max_concurrency=2)
+
+        assert results == ["notificação"] * 6
+        assert slow_provider.peak == 2
+
+    async def test_failures_are_returned_in_order(self, slow_provider):
+        """
+        A falha de um item deve vir na sua posição, sem afetar os demais.
+        """
+        requests = [
+            {"persona_id": "motivador", "use_rag": False},
+            {"persona_id": "inexistente", "use_rag": False},
+        ]
+
+        results = await PersonaService.generate_proactive_batch(requests)
+
+        assert results[0] == "notificação"
+        assert isinstance(results[1], ValueError)
+
+
+class TestProactiveCache:
+    """Testes para o cache de mensagens proativas."""
+
+    async def test_repeated_request_uses_cache(self, slow_provider):
+        """
+        A mesma combinação de persona/perfil/modelo deve gerar uma única vez.
+        """
+        args = {"persona_id": "provocador", "target_profile_id": "gastao", "use_rag": False}
+
+        first = await PersonaService.generate_proactive_message(**args)
+        second = await PersonaService.generate_proactive_message(**args)
+
+        assert first == second == "notificação"
+        assert slow_provider.calls == 1
+
+    async def test_concurrent_requests_coalesce(self, slow_provider):
+        """
+        Pedidos idênticos simultâneos devem compartilhar uma única geração.
+        """
+        requests = [{"persona_id": "debochado", "use_rag": False}] * 5
+
+        results = await PersonaService.generate_proactive_batch(requests)
+
+        assert results == ["notificação"] * 5
+        assert slow_provider.calls == 1
+
+    async def test_override_is_part_of_key(self, slow_provider):
+        """
+        Um system prompt de override não pode reaproveitar a mensagem da persona original.
+        """
+        override = MagicMock(system_prompt="Outro tom")
+
+        await PersonaService.generate_proactive_message("motivador", use_rag=False)
+        await PersonaService.generate_proactive_message(
+            "motivador", persona_override=override, use_rag=False
+        )
+
+        assert slow_provider.calls == 2
+
+
+class TestProactiveStream:
+    """Testes para PersonaService.generate_proactive_message_stream."""
+
+    @staticmethod
+    def make_provider(chunks):
+        """Provider falso com generate e generate_stream sobre o mesmo texto."""
+        provider = MagicMock()
+        provider.generate = AsyncMock(return_value="".join(chunks))
+
+        async def generate_stream(prompt, history=None, model_override=None):
+            for chunk in chunks:
+                yield chunk
+
+        provider.generate_stream = generate_stream
+        return provider
+
+    async def test_stream_and_non_stream_cache_the_same_value(self):
+        """
+        As duas versões devem guardar o mesmo texto (sem espaços nas pontas) no cache.
+        """
+        provider = self.make_provider(["\n Economize ", "energia! \n"])
+        args = {"persona_id": "motivador", "use_rag": False, "provider": provider}
+
+        streamed = [c async for c in PersonaService.generate_proactive_message_stream(**args)]
+        from_stream = persona_service._PROACTIVE_CACHE.get(("motivador", None, None, None, False))
+        clear_proactive_cache()
+        direct = await PersonaService.generate_proactive_message(**args)
+
+        assert "".join(streamed) == "\n Economize energia! \n"
+        assert from_stream == direct == "Economize energia!"
+
+    async def test_stream_error_is_wrapped(self):
+        """
+        Falha do provider no meio do stream deve virar LLMProviderError.
+        """
+        provider = MagicMock()
+
+        async def generate_stream(prompt, history=None, model_override=None):
+            yield "Eco"
+            raise RuntimeError("conexão perdida")
+
+        provider.generate_stream = generate_stream
+
+        with pytest.raises(LLMProviderError):
+            async for _ in PersonaService.generate_proactive_message_stream(
+                "motivador", use_rag=False, provider=provider
+            ):
+                pass
+        assert len(persona_service._PROACTIVE_CACHE) == 0
+
+
+class TestWarmupProactiveMessages:
+    """Testes para warmup_proactive_messages."""
+
+    async def test_warmup_fills_cache_per_persona(self, slow_provider):
+        """
+        Deve gerar uma mensagem por persona e deixá-las no cache.
+        """
+        await warmup_proactive_messages()
+        assert slow_provider.calls == len(PERSONAS)
+
+        await PersonaService.generate_proactive_message(PERSONAS[0].id, use_rag=False)
+        assert slow_provider.calls == len(PERSONAS)
+
+
+class TestProviderInjection:
+    """Testes para o provider injetado em generate_proactive_message."""
+
+    async def test_injected_provider_is_used(self, slow_provider):
+        """
+        Um provider passado explicitamente deve substituir o configurado.
+        """
+        injected = MagicMock()
+        injected.generate = AsyncMock(return_value="injetado")
+
+        message = await PersonaService.generate_proactive_message(
+            "motivador", use_rag=False, provider=injected
+        )
+
+        assert message == "injetado"
+        assert slow_provider.calls == 0
+
+
+class TestGenerateByPersona:
+    """Testes para PersonaService.generate_proactive_messages_by_persona."""
+
+    @staticmethod
+    def make_batch_provider():
+        """Provider falso cujo generate_batch ecoa o perfil de cada prompt."""
+        provider = MagicMock()
+
+        async def generate_batch(prompts, histories, model_override=None):
+            return [prompt.split("Nome do Perfil: ")[1].split("\n")[0] for prompt in prompts]
+
+        provider.generate_batch = AsyncMock(side_effect=generate_batch)
+        return provider
+
+    async def test_single_batch_with_shared_prefix(self):
+        """
+        Os perfis devem ir em um único lote, com prompts que só diferem no fim.
+        """
+        provider = self.make_batch_provider()
+
+        messages = await PersonaService.generate_proactive_messages_by_persona(
+            "provocador", ["gastao", "engajado", "gastao"], use_rag=False, provider=provider
+        )
+
+        provider.generate_batch.assert_called_once()
+        prompts = provider.generate_batch.call_args.args[0]
+        assert len(prompts) == 2
+        prefix = persona_service._PROACTIVE_PREFIX_BY_ID["provocador"]
+        assert all(prompt.startswith(prefix) for prompt in prompts)
+        assert messages == ["O Gastão Sem Noção", "O Engajado", "O Gastão Sem Noção"]
+
+    async def test_cached_targets_are_skipped(self):
+        """
+        Perfis com mensagem em cache não devem entrar no lote.
+        """
+        provider = self.make_batch_provider()
+        await PersonaService.generate_proactive_messages_by_persona(
+            "motivador", ["gastao"], use_rag=False, provider=provider
+        )
+
+        await PersonaService.generate_proactive_messages_by_persona(
+            "motivador", ["gastao", "indiferente"], use_rag=False, provider=provider
+        )
+
+        assert len(provider.generate_batch.call_args.args[0]) == 1
+
+    async def test_partial_failure_is_wrapped(self):
+        """
+        Falhas individuais devem vir como LLMProviderError, sem afetar os demais.
+        """
+        provider = MagicMock()
+
+        async def generate_batch(prompts, histories, model_override=None):
+            return ["Economize!", ConnectionError("timeout")]
+
+        provider.generate_batch = AsyncMock(side_effect=generate_batch)
+
+        messages = await PersonaService.generate_proactive_messages_by_persona(
+            "debochado", ["gastao", "engajado"], use_rag=False, provider=provider
+        )
+
+        assert messages[0] == "Economize!"
+        assert isinstance(messages[1], LLMProviderError)
+        assert "timeout" in str(messages[1])
@@ -0,0 +1,115 @@
+"""
+Testes para o cache de embeddings de consultas do RAG.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.rag.query_cache import DiskEmbeddingStore, QueryEmbeddingCache, dequantize, quantize
+
+
+class TestQueryEmbeddingCache:
+    """Testes para o QueryEmbeddingCache."""
+
+    def test_repeated_query_embeds_once(self):
+        """
+        A mesma query deve chamar a API de embeddings uma única vez.
+        """
+        embedder = MagicMock()
+        embedder.embed_query.return_value = [0.1, 0.2]
+        cache = QueryEmbeddingCache(max_size=10, ttl=60)
+
+        first = cache.get_or_embed("economia de energia", embedder)
+        second = cache.get_or_embed("economia de energia", embedder)
+
+        assert first == [0.1, 0.2]
+        assert second == pytest.approx(first, rel=1e-2)
+        embedder.embed_query.assert_called_once_with("economia de energia")
+        assert cache.hit_rate == 0.5
+
+    def test_different_queries_are_embedded_separately(self):
+        """
+        Queries diferentes não podem compartilhar o mesmo vetor.
+        """
+        embedder = MagicMock()
+        embedder.embed_query.side_effect = lambda q: [float(len(q))]
+        cache = QueryEmbeddingCache(max_size=10, ttl=60)
+
+        assert cache.get_or_embed("a", embedder) == [1.0]
+        assert cache.get_or_embed("abc", embedder) == [3.0]
+        assert embedder.embed_query.call_count == 2
+
+    def test_batch_embeds_only_missing_queries_in_one_call(self):
+        """
+        Em lote, só as queries fora do cache vão para a API, em uma chamada.
+        """
+        embedder = MagicMock()
+        embedder.embed_query.return_value = [1.0]
+        embed_many = MagicMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+        cache = QueryEmbeddingCache(max_size=10, ttl=60)
+        cache.get_or_embed("a", embedder)
+
+        vectors = cache.get_many_or_embed(["a", "bb", "ccc", "bb"], embed_many)
+
+        assert vectors == [[1.0], [2.0], [3.0], [2.0]]
+        embed_many.assert_called_once_with(["bb", "ccc"])
+
+    def test_disk_tier_survives_new_instance(self, tmp_path):
+        """
+        Com o nível em disco, um novo cache (novo processo) reaproveita o vetor.
+        """
+        embedder = MagicMock()
+        embedder.embed_query.return_value = [0.5, -0.25]
+        path = tmp_path / "emb.db"
+
+        first = QueryEmbeddingCache(max_size=10, ttl=60, namespace="m1", disk=DiskEmbeddingStore(path))
+        first.get_or_embed("consulta", embedder)
+
+        second = QueryEmbeddingCache(max_size=10, ttl=60, namespace="m1", disk=DiskEmbeddingStore(path))
+        assert second.get_or_embed("consulta", embedder) == [0.5, -0.25]
+        embedder.embed_query.assert_called_once()
+
+    def test_disk_store_opens_lazily(self, tmp_path):
+        """
+        Criar o nível em disco não deve tocar o sistema de arquivos até o primeiro uso.
+        """
+        path = tmp_path / "sub" / "emb.db"
+        disk = DiskEmbeddingStore(path)
+        assert not path.parent.exists()
+
+        disk.set(b"chave", [1.0])
+        assert path.exists()
+        disk.close()
+
+    def test_namespace_isolates_models(self, tmp_path):
+        """
+        Trocar o modelo (namespace) não pode reaproveitar vetores antigos.
+        """
+        disk = DiskEmbeddingStore(tmp_path / "emb.db")
+        QueryEmbeddingCache(namespace="m1", disk=disk).set("consulta", [1.0])
+
+        assert QueryEmbeddingCache(namespace="m2", disk=disk).get("consulta") is None
+
+    def test_quantization_round_trip_is_close(self):
+        """
+        Vetor quantizado em int8 deve voltar próximo do original.
+        """
+        embedding = [0.02, -0.5, 0.31, 0.0, 0.499]
+
+        scale, values = quantize(embedding)
+
+        assert values.dtype == "int8"
+        assert dequantize(scale, values) == pytest.approx(embedding, abs=0.5 / 127)
+
+    def test_unquantized_cache_returns_exact_vector(self):
+        """
+        Com quantização desligada, o vetor volta idêntico.
+        """
+        embedder = MagicMock()
+        embedder.embed_query.return_value = [0.1, 0.2]
+        cache = QueryEmbeddingCache(max_size=10, ttl=60, quantized=False)
+
+        cache.get_or_embed("q", embedder)
+
+        assert cache.get("q") == [0.1, 0.2]
@@ -0,0 +1,118 @@
+"""
+Testes para o retriever do RAG.
+"""
+
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+
+from app.rag.retriever import RESULT_DTYPE, _format_results, _join_context_streamed, _search_distinct, to_dicts
+
+
+def make_store(results):
+    """Vector store falso que devolve os pares (documento, distância) dados."""
+    store = MagicMock()
+    store.similarity_search_by_vector_with_relevance_scores.return_value = results
+    return store
+
+
+class TestSearchDistinct:
+    """Testes para a busca top-k sem duplicatas."""
+
+    def test_keeps_best_chunk_per_page(self):
+        """
+        Chunks da mesma (source, page) devem aparecer uma única vez.
+        """
+        results = [
+            (Document(page_content="a1", metadata={"source": "a.pdf", "page": 1}), 0.1),
+            (Document(page_content="a1b", metadata={"source": "a.pdf", "page": 1}), 0.2),
+            (Document(page_content="a2", metadata={"source": "a.pdf", "page": 2}), 0.3),
+            (Document(page_content="b1", metadata={"source": "b.pdf", "page": 1}), 0.4),
+        ]
+
+        distinct = _search_distinct(make_store(results), [0.0], k=2)
+
+        assert [doc.page_content for doc, _ in distinct] == ["a1", "a2"]
+
+    def test_chunks_without_metadata_are_not_collapsed(self):
+        """
+        Chunks sem source/page não podem virar um único resultado.
+        """
+        results = [
+            (Document(page_content="x", metadata={}), 0.1),
+            (Document(page_content="y", metadata={}), 0.2),
+            (Document(page_content="x", metadata={}), 0.3),
+            (Document(page_content="z", metadata={"source": "a.pdf"}), 0.4),
+        ]
+
+        distinct = _search_distinct(make_store(results), [0.0], k=3)
+
+        assert [doc.page_content for doc, _ in distinct] == ["x", "y", "z"]
+
+    def test_over_fetches_candidates(self):
+        """
+        A busca deve pedir mais candidatos que k para compensar duplicatas.
+        """
+        store = make_store([])
+
+        _search_distinct(store, [0.0], k=4)
+
+        _, kwargs = store.similarity_search_by_vector_with_relevance_scores.call_args
+        assert kwargs["k"] == 16
+
+
+class TestFormatResults:
+    """Testes para o array estruturado de resultados."""
+
+    def test_builds_structured_array(self):
+        """
+        Os resultados devem virar um array com o dtype de resultados.
+        """
+        results = [
+            (Document(page_content="a", metadata={"source": "/docs/a.pdf", "page": 3}), 0.25),
+            (Document(page_content="b", metadata={}), 0.5),
+        ]
+
+        records = _format_results(results)
+
+        assert records.dtype == RESULT_DTYPE
+        assert records["score"].tolist() == [0.25, 0.5]
+        assert records["source"].tolist() == ["a.pdf", "Desconhecido"]
+
+    def test_to_dicts_matches_api_format(self):
+        """
+        `to_dicts` deve devolver dicts com tipos nativos para a resposta JSON.
+        """
+        results = [(Document(page_content="a", metadata={"source": "a.pdf", "page": 1}), 0.25)]
+
+        assert to_dicts(_format_results(results)) == [
+            {"content": "a", "source": "a.pdf", "page": 1, "score": 0.25}
+        ]
+        assert to_dicts(_format_results([])) == []
+
+    def test_keeps_exact_score_and_accepts_missing_page(self):
+        """
+        A distância deve sair sem arredondamento e page=None deve virar 0.
+        """
+        results = [(Document(page_content="a", metadata={"source": "a.pdf", "page": None}), 0.41234567891)]
+
+        record = to_dicts(_format_results(results))[0]
+
+        assert record["score"] == 0.41234567891
+        assert record["page"] == 0
+
+
+class TestJoinContext:
+    """Testes para a montagem do contexto com muitos trechos."""
+
+    def test_streamed_matches_join(self):
+        """
+        O contexto montado via StringIO deve ser idêntico ao do join.
+        """
+        docs = [Document(page_content=f"trecho {i} \n") for i in range(12)]
+
+        expected = "\n\n".join(
+            f"--- Trecho {i} ---\n{doc.page_content}" for i, doc in enumerate(docs, start=1)
+        )
+
+        assert _join_context_streamed(docs) == expected
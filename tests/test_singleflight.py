@@ -0,0 +1,64 @@
+"""
+Testes para a deduplicação de chamadas concorrentes.
+"""
+
+import asyncio
+
+from app.core.singleflight import SingleFlight, make_key
+
+
+class TestSingleFlight:
+    """Testes para o SingleFlight."""
+
+    async def test_concurrent_calls_share_one_execution(self):
+        """
+        Chamadas concorrentes com a mesma chave devem executar uma vez só.
+        """
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "resultado"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+        assert results == ["resultado"] * 5
+        assert calls == 1
+        assert len(flight) == 0
+
+    async def test_different_keys_run_separately(self):
+        """
+        Chaves diferentes não podem compartilhar resultado.
+        """
+        flight = SingleFlight()
+
+        async def echo(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            flight.do(make_key("a"), lambda: echo("a")),
+            flight.do(make_key("b"), lambda: echo("b")),
+        )
+
+        assert results == ["a", "b"]
+
+    async def test_errors_reach_every_waiter(self):
+        """
+        Erro da chamada compartilhada deve chegar a todos que aguardavam.
+        """
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("falhou")
+
+        results = await asyncio.gather(
+            flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert len(flight) == 0
@@ -1,11 +1,11 @@
-import requests
-import json
+import asyncio
 import sys
 
-BASE_URL = "http://localhost:8001"
+from _notification_probes import BASE_URL, make_client
+
 SESSION_ID = "test-session-override"
 
-def test_chat_model_override():
+async def test_chat_model_override(client):
     print(f"Testing POST {BASE_URL}/chat with model override...")
     payload = {
         "session_id": SESSION_ID,
@@ -14,7 +14,7 @@ def test_chat_model_override():
     }
     
     try:
-        response = requests.post(f"{BASE_URL}/chat", json=payload)
+        response = await client.post("/chat", json=payload)
         
         if response.status_code == 200:
             data = response.json()
@@ -35,5 +35,9 @@ def test_chat_model_override():
         print(f"❌ Error in chat request: {e}")
         sys.exit(1)
 
+async def main():
+    async with make_client() as client:
+        await test_chat_model_override(client)
+
 if __name__ == "__main__":
-    test_chat_model_override()
+    asyncio.run(main())